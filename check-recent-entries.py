@@ -3,15 +3,29 @@
 Find and show recent entries to understand the current state
 """
 
+import argparse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from sheets_reader_enhanced import SheetsReaderEnhanced
+from sheet_utils import cell_hours, cell_text
 import json
 
-def check_recent_entries():
-    """Check recent entries to understand current state."""
+# Invoice used for the test entries unless --invoice is given
+DEFAULT_TEST_INVOICE = "NES01-5541"
+
+def check_recent_entries(invoice_number=DEFAULT_TEST_INVOICE, assume_yes=False, dry_run=False, use_snapshot=False):
+    """
+    Check recent entries to understand current state.
+    
+    Args:
+        invoice_number: Invoice number assigned to the test entries
+        assume_yes: Run the test update without asking for confirmation
+        dry_run: Only list the entries, never write to the spreadsheet
+        use_snapshot: Serve the reads from the local snapshot while the spreadsheet
+            is unchanged (needs the Drive API); the run is then listing-only
+    """
     try:
         # Load configuration
         with open("config_secure.json", 'r') as f:
@@ -25,76 +39,78 @@ def check_recent_entries():
         
         print("🔍 Checking recent entries in the spreadsheet...")
         
-        # Get the worksheet
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
+        # Read the header row plus the Date and Paid columns only; together they
+        # give the row count and the WIP rows without downloading every column
+        header_columns, date_column, paid_column = sheets_reader.values_batch_get(
+            ['Sheet1!1:1', 'Sheet1!A2:A', 'Sheet1!G2:G'],
+            major_dimension='COLUMNS',
+            use_snapshot=use_snapshot
+        )
+        headers = [column[0] if column else '' for column in header_columns]
+        dates = date_column[0] if date_column else []
+        statuses = paid_column[0] if paid_column else []
+        total_rows = max(len(dates), len(statuses)) + 1  # Including the header row
+        
+        wip_rows = [
+            row_idx for row_idx, status in enumerate(statuses, start=2)
+            if cell_text(status).upper() == "WIP"
+        ]
+        
+        # Fetch the last 20 rows and the WIP rows in one bounded request
+        recent_row_numbers = list(range(max(2, total_rows - 19), total_rows + 1))
+        rows = sheets_reader.get_rows(recent_row_numbers + wip_rows, "Sheet1", use_snapshot=use_snapshot)
         
-        # Get the last 20 rows to see recent entries
-        all_values = worksheet.get_all_values()
-        headers = all_values[0]
+        # Read every cell as text (values are UNFORMATTED, so some are numbers) and
+        # pad rows to the full A:G width (the values API drops trailing empty cells)
+        rows = {row_idx: [cell_text(value) for value in row] + [''] * (7 - len(row)) for row_idx, row in rows.items()}
         
         print(f"📊 Headers: {headers}")
-        print(f"📊 Total rows: {len(all_values)}")
+        print(f"📊 Total rows: {total_rows}")
         
         # Show last 20 rows
         print(f"\n📋 Last 20 entries:")
-        recent_rows = all_values[-20:] if len(all_values) > 20 else all_values[1:]
         
-        for i, row in enumerate(recent_rows):
-            row_num = len(all_values) - len(recent_rows) + i + 1
-            if len(row) >= 7:
-                date = row[0] if len(row) > 0 else ""
-                hours = row[1] if len(row) > 1 else ""
-                category = row[2] if len(row) > 2 else ""
-                task = row[3] if len(row) > 3 else ""
-                persons = row[4] if len(row) > 4 else ""
-                invoice = row[5] if len(row) > 5 else ""
-                paid = row[6] if len(row) > 6 else ""
-                
-                print(f"Row {row_num}: {date} | {hours}h | {category} | {task[:30]}... | {persons} | {invoice} | {paid}")
+        # Collect the listing lines and write them out in one go
+        out = []
+        for row_num in recent_row_numbers:
+            date, hours, category, task, persons, invoice, paid = rows[row_num][:7]
+            out.append(f"Row {row_num}: {date} | {hours}h | {category} | {task[:30]}... | {persons} | {invoice} | {paid}")
         
         # Look for any WIP entries
-        print(f"\n🔍 Looking for WIP entries...")
-        wip_count = 0
-        for row_idx, row in enumerate(all_values[1:], start=2):
-            if len(row) > 6:
-                paid_status = row[6].strip().upper()
-                if paid_status == "WIP":
-                    wip_count += 1
-                    if wip_count <= 10:  # Show first 10 WIP entries
-                        date = row[0] if len(row) > 0 else ""
-                        hours = row[1] if len(row) > 1 else ""
-                        task = row[3] if len(row) > 3 else ""
-                        print(f"WIP Row {row_idx}: {date} | {hours}h | {task[:40]}...")
+        out.append(f"\n🔍 Looking for WIP entries...")
+        wip_count = len(wip_rows)
+        for row_idx in wip_rows[:10]:  # Show first 10 WIP entries
+            row = rows[row_idx]
+            date, hours, task = row[0], row[1], row[3]
+            out.append(f"WIP Row {row_idx}: {date} | {hours}h | {task[:40]}...")
+        sys.stdout.write('\n'.join(out) + '\n')
         
         print(f"\n📊 Total WIP entries found: {wip_count}")
         
-        # If there are WIP entries, let's create some test entries for NES01-5541
+        # If there are WIP entries, let's create some test entries for the invoice
         if wip_count > 0:
-            print(f"\n🧪 Creating test entries for NES01-5541 update...")
+            print(f"\n🧪 Creating test entries for {invoice_number} update...")
             
             # Find some WIP entries to use as test data
             test_entries = []
-            for row_idx, row in enumerate(all_values[1:], start=2):
-                if len(row) > 6 and row[6].strip().upper() == "WIP":
-                    if len(test_entries) < 3:  # Take first 3 WIP entries as test
-                        try:
-                            hours = float(row[1]) if row[1] else 0
-                            if hours > 0:
-                                entry = {
-                                    "date": row[0],
-                                    "hours": hours,
-                                    "category": row[2] if len(row) > 2 else "Enhancement",
-                                    "description": row[3] if len(row) > 3 else "",
-                                    "persons": row[4] if len(row) > 4 else "",
-                                    "invoice": "NES01-5541",
-                                    "row_number": row_idx
-                                }
-                                test_entries.append(entry)
-                        except ValueError:
-                            continue
+            for row_idx in wip_rows:
+                row = rows[row_idx]
+                if len(test_entries) < 3:  # Take first 3 WIP entries as test
+                    hours = cell_hours(row[1]) or 0
+                    if hours > 0:
+                        entry = {
+                            "date": row[0],
+                            "hours": hours,
+                            "category": row[2] or "Enhancement",
+                            "description": row[3],
+                            "persons": row[4],
+                            "invoice": invoice_number,
+                            "row_number": row_idx
+                        }
+                        test_entries.append(entry)
             
             if test_entries:
-                print(f"\n📋 Test entries for NES01-5541 update:")
+                print(f"\n📋 Test entries for {invoice_number} update:")
                 total_hours = 0
                 for entry in test_entries:
                     print(f"Row {entry['row_number']}: {entry['date']} | {entry['hours']}h | {entry['description'][:40]}...")
@@ -102,9 +118,17 @@ def check_recent_entries():
                 
                 print(f"⏱️  Total Hours: {total_hours}")
                 
-                # Ask for confirmation to test the update
-                print(f"\n🧪 Test updating these {len(test_entries)} entries to 'Billed' with orange highlighting? (y/n): ", end="")
-                response = input().strip().lower()
+                # Never write based on snapshot reads
+                if dry_run or use_snapshot:
+                    print("ℹ️  Dry run: no changes made")
+                    return True
+                
+                # Ask for confirmation to test the update unless --yes was given
+                if assume_yes:
+                    response = "yes"
+                else:
+                    print(f"\n🧪 Test updating these {len(test_entries)} entries to 'Billed' with orange highlighting? (y/n): ", end="")
+                    response = input().strip().lower()
                 
                 if response in ['y', 'yes']:
                     print("🔄 Testing Billed update with orange highlighting...")
@@ -131,5 +155,18 @@ def check_recent_entries():
         return False
 
 if __name__ == "__main__":
-    check_recent_entries()
+    parser = argparse.ArgumentParser(description="Show recent and WIP entries and optionally test the Billed update")
+    parser.add_argument("--invoice", default=DEFAULT_TEST_INVOICE,
+                        help=f"Invoice number for the test entries (default: {DEFAULT_TEST_INVOICE})")
+    parser.add_argument("--yes", action="store_true",
+                        help="Run the test update without asking for confirmation")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the entries without updating the spreadsheet")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Reuse the local sheet snapshot while the spreadsheet is unchanged "
+                             "(needs the Drive API; implies --dry-run)")
+    args = parser.parse_args()
+    
+    check_recent_entries(invoice_number=args.invoice, assume_yes=args.yes, dry_run=args.dry_run,
+                         use_snapshot=args.snapshot)
 
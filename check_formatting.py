@@ -25,12 +25,24 @@ def check_billed_formatting():
         
         print("🔍 Checking formatting of example billed rows (932-938)...")
         
-        # Get the worksheet
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
+        # Fetch values and formatting for the range in a single request;
+        # the grid data carries both the formatted value and the effective format
+        range_name = "Sheet1!A932:G938"
+        response = sheets_reader.spreadsheet.fetch_sheet_metadata(params={
+            'ranges': range_name,
+            'includeGridData': 'true'
+        })
         
-        # Get data from rows 932-938
-        range_name = "A932:G938"
-        values = worksheet.get(range_name, value_render_option='FORMATTED_VALUE')
+        row_data_list = []
+        if 'sheets' in response and len(response['sheets']) > 0:
+            sheet_data = response['sheets'][0]
+            if 'data' in sheet_data and len(sheet_data['data']) > 0:
+                row_data_list = sheet_data['data'][0].get('rowData', [])
+        
+        values = [
+            [cell_data.get('formattedValue', '') for cell_data in row_data.get('values', [])]
+            for row_data in row_data_list
+        ]
         
         print(f"\n📊 Data in rows 932-938:")
         for i, row in enumerate(values, start=932):
@@ -45,33 +57,19 @@ def check_billed_formatting():
                 
                 print(f"Row {i}: {date} | {hours}h | {category} | {task[:30]}... | {persons} | {invoice} | {paid}")
         
-        # Try to get formatting information using the spreadsheet API
         print(f"\n🎨 Checking cell formatting...")
         
-        # Get formatting for the range
-        request = {
-            'ranges': [range_name],
-            'includeGridData': True
-        }
-        
-        response = sheets_reader.spreadsheet.batch_get(ranges=[range_name], 
-                                                      include_grid_data=True)
-        
-        if 'sheets' in response and len(response['sheets']) > 0:
-            sheet_data = response['sheets'][0]
-            if 'data' in sheet_data and len(sheet_data['data']) > 0:
-                grid_data = sheet_data['data'][0]
-                if 'rowData' in grid_data:
-                    print(f"Found formatting data for {len(grid_data['rowData'])} rows")
-                    
-                    for i, row_data in enumerate(grid_data['rowData'], start=932):
-                        if 'values' in row_data:
-                            for j, cell_data in enumerate(row_data['values']):
-                                if 'effectiveFormat' in cell_data:
-                                    format_data = cell_data['effectiveFormat']
-                                    if 'backgroundColor' in format_data:
-                                        bg_color = format_data['backgroundColor']
-                                        print(f"Row {i}, Col {j}: Background color: {bg_color}")
+        if row_data_list:
+            print(f"Found formatting data for {len(row_data_list)} rows")
+            
+            for i, row_data in enumerate(row_data_list, start=932):
+                if 'values' in row_data:
+                    for j, cell_data in enumerate(row_data['values']):
+                        if 'effectiveFormat' in cell_data:
+                            format_data = cell_data['effectiveFormat']
+                            if 'backgroundColor' in format_data:
+                                bg_color = format_data['backgroundColor']
+                                print(f"Row {i}, Col {j}: Background color: {bg_color}")
         
         return True
         
@@ -3,16 +3,21 @@
 Fix the color of the previously updated rows to match the reference
 """
 
+import argparse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from sheets_reader_enhanced import SheetsReaderEnhanced
+from sheets_reader_enhanced import SheetsReaderEnhanced, get_billed_color
+from sheet_utils import cell_text, coalesce_row_runs, column_map
 import json
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
+from google_clients import execute_batch_update
 
-def fix_existing_billed_rows_color():
+# Invoice and status whose rows get recoloured
+TARGET_INVOICE = "NES01-5541"
+TARGET_STATUS = "BILLED"
+
+def fix_existing_billed_rows_color(refresh_ref_color=False):
     """Fix the color of existing Billed rows for NES01-5541 to match reference."""
     try:
         # Load configuration
@@ -27,54 +32,42 @@ def fix_existing_billed_rows_color():
         
         print("🎨 Fixing color of existing Billed rows for NES01-5541...")
         
-        # Get the correct reference color
-        credentials = Credentials.from_service_account_file(
-            config["google_sheets"]["credentials_path"], 
-            scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+        # Get the correct reference color (cached on disk, see get_billed_color)
+        reference_color = get_billed_color(
+            config["google_sheets"]["credentials_path"],
+            config["google_sheets"]["spreadsheet_id"],
+            refresh=refresh_ref_color
         )
-        service = build('sheets', 'v4', credentials=credentials)
-        
-        # Get formatting from reference row (932)
-        response = service.spreadsheets().get(
-            spreadsheetId=config["google_sheets"]["spreadsheet_id"],
-            ranges=['Sheet1!A932:G932'],
-            includeGridData=True
-        ).execute()
-        
-        reference_color = {"red": 1, "green": 0.6}  # From previous detection
-        if 'sheets' in response and len(response['sheets']) > 0:
-            sheet_data = response['sheets'][0]
-            if 'data' in sheet_data and len(sheet_data['data']) > 0:
-                grid_data = sheet_data['data'][0]
-                if 'rowData' in grid_data and len(grid_data['rowData']) > 0:
-                    row_data = grid_data['rowData'][0]
-                    if 'values' in row_data and len(row_data['values']) > 0:
-                        cell_data = row_data['values'][0]
-                        if 'effectiveFormat' in cell_data and 'backgroundColor' in cell_data['effectiveFormat']:
-                            reference_color = cell_data['effectiveFormat']['backgroundColor']
         
         print(f"🎨 Using reference color: {reference_color}")
         
-        # Find all Billed entries for NES01-5541
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
-        all_values = worksheet.get_all_values()
-        headers = all_values[0]
+        # Find all Billed entries for NES01-5541 (headers and data in one batchGet)
+        header_values, data_values = sheets_reader.values_batch_get(['Sheet1!1:1', 'Sheet1!A2:G'])
+        headers = header_values[0] if header_values else []
+        
+        # Find column indices (cached per header layout)
+        columns = column_map(tuple(headers))
+        invoice_col = columns["invoice"]
+        status_col = columns["status"]
+        
+        # Pad every row once so the columns can be indexed without bounds checks
+        width = max(invoice_col, status_col, 1) + 1
+        data_rows = [(row + [''] * width)[:width] for row in data_values]
         
-        # Find column indices
-        invoice_col = sheets_reader._find_column_index(headers, ['invoice'])
-        status_col = sheets_reader._find_column_index(headers, ['paid', 'status'])
+        # Normalize the invoice and status columns once, then match them side by side
+        invoices = [cell_text(row[invoice_col]) for row in data_rows]
+        statuses = [cell_text(row[status_col]).upper() for row in data_rows]
         
-        billed_rows = []
+        # Look for entries with NES01-5541 invoice number that are Billed
+        billed_rows = [
+            row_idx
+            for row_idx, (invoice, status) in enumerate(zip(invoices, statuses), start=2)
+            if invoice == TARGET_INVOICE and status == TARGET_STATUS
+        ]
         
-        for row_idx, row in enumerate(all_values[1:], start=2):
-            if len(row) > max(invoice_col, status_col):
-                invoice = row[invoice_col].strip() if invoice_col < len(row) else ""
-                status = row[status_col].strip().upper() if status_col < len(row) else ""
-                
-                # Look for entries with NES01-5541 invoice number that are Billed
-                if invoice == "NES01-5541" and status == "BILLED":
-                    billed_rows.append(row_idx)
-                    print(f"Found Billed row {row_idx}: {row[0]} | {row[1]}h")
+        for row_idx in billed_rows:
+            row = data_rows[row_idx - 2]
+            print(f"Found Billed row {row_idx}: {row[0]} | {row[1]}h")
         
         if not billed_rows:
             print("ℹ️  No Billed entries found for NES01-5541")
@@ -82,16 +75,16 @@ def fix_existing_billed_rows_color():
         
         print(f"\n🎨 Fixing color for {len(billed_rows)} Billed rows...")
         
-        # Create format requests for all billed rows
+        # Create one format request per run of consecutive billed rows
         format_requests = []
         
-        for row_number in billed_rows:
+        for first_row, last_row in coalesce_row_runs(billed_rows):
             format_request = {
                 "repeatCell": {
                     "range": {
                         "sheetId": 0,  # Assuming first sheet
-                        "startRowIndex": row_number - 1,  # 0-based for API
-                        "endRowIndex": row_number,
+                        "startRowIndex": first_row - 1,  # 0-based for API
+                        "endRowIndex": last_row,
                         "startColumnIndex": 0,  # Column A
                         "endColumnIndex": 7   # Column G (0-based, so 7 means up to column G)
                     },
@@ -106,16 +99,14 @@ def fix_existing_billed_rows_color():
             format_requests.append(format_request)
         
         if format_requests:
-            body = {
-                "requests": format_requests
-            }
-            
-            service.spreadsheets().batchUpdate(
-                spreadsheetId=config["google_sheets"]["spreadsheet_id"],
-                body=body
-            ).execute()
+            # All format changes go out in one atomic batchUpdate
+            execute_batch_update(
+                config["google_sheets"]["credentials_path"],
+                config["google_sheets"]["spreadsheet_id"],
+                format_requests
+            )
             
-            print(f"✅ Fixed color for {len(format_requests)} Billed rows")
+            print(f"✅ Fixed color for {len(billed_rows)} Billed rows")
             print("🎨 All NES01-5541 rows should now have the correct orange color")
             return True
         
@@ -126,5 +117,10 @@ def fix_existing_billed_rows_color():
         return False
 
 if __name__ == "__main__":
-    fix_existing_billed_rows_color()
+    parser = argparse.ArgumentParser(description="Fix the color of Billed rows for NES01-5541")
+    parser.add_argument("--refresh-ref-color", action="store_true",
+                        help="Re-read the reference row color instead of using the cached one")
+    args = parser.parse_args()
+    
+    fix_existing_billed_rows_color(refresh_ref_color=args.refresh_ref_color)
 
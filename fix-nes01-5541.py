@@ -1,19 +1,34 @@
 #!/usr/bin/env python3
 """
-Check the exact orange color from the reference rows and find all NES01-5541 entries
+Check the exact orange color from the reference rows and find all WIP entries of an invoice (NES01-5541 by default)
 """
 
+import argparse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from sheets_reader_enhanced import SheetsReaderEnhanced
+from sheets_reader_enhanced import SheetsReaderEnhanced, get_billed_color
+from sheet_utils import billed_update_requests, cell_hours, cell_text, column_map
+from gspread.utils import rowcol_to_a1
 import json
-from googleapiclient.discovery import build
-from google.oauth2.service_account import Credentials
+import operator
+from google_clients import execute_batch_update
 
-def get_reference_color_and_find_all_entries():
-    """Get the exact orange color from reference rows and find all NES01-5541 entries."""
+# Default invoice and the status of the entries to mark as Billed
+TARGET_INVOICE = "NES01-5541"
+TARGET_STATUS = "WIP"
+
+def get_reference_color_and_find_all_entries(invoice_number=TARGET_INVOICE, refresh_ref_color=False, assume_yes=False, dry_run=False):
+    """
+    Get the exact orange color from reference rows and find all WIP entries of an invoice.
+    
+    Args:
+        invoice_number: Invoice whose remaining WIP entries are marked as Billed
+        refresh_ref_color: Re-read the reference color instead of using the cached one
+        assume_yes: Apply the fix without asking for confirmation
+        dry_run: Only list the entries, never write to the spreadsheet
+    """
     try:
         # Load configuration
         with open("config_secure.json", 'r') as f:
@@ -27,109 +42,111 @@ def get_reference_color_and_find_all_entries():
         
         print("🔍 Getting exact orange color from reference rows 932-938...")
         
-        # Build the Sheets API service to get formatting
-        credentials = Credentials.from_service_account_file(
-            config["google_sheets"]["credentials_path"], 
-            scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
+        # Reference color is cached on disk, see get_billed_color
+        reference_color = get_billed_color(
+            config["google_sheets"]["credentials_path"],
+            config["google_sheets"]["spreadsheet_id"],
+            refresh=refresh_ref_color
+        )
+        print(f"🎨 Using reference color: {reference_color}")
+        
+        # Now find ALL entries for the invoice
+        print(f"\n🔍 Finding ALL entries for {invoice_number}...")
+        
+        # The values API cannot filter by cell value, so read the header row first,
+        # then only the invoice/status columns (column-major, one flat list per
+        # column), then fetch only the matching rows
+        headers = sheets_reader.get_headers("Sheet1")
+        
+        # Find column indices (cached per header layout)
+        columns = column_map(tuple(headers))
+        invoice_letter = rowcol_to_a1(1, columns["invoice"] + 1)[:-1]
+        status_letter = rowcol_to_a1(1, columns["status"] + 1)[:-1]
+        
+        invoice_column, status_column = sheets_reader.values_batch_get(
+            [f"Sheet1!{invoice_letter}2:{invoice_letter}", f"Sheet1!{status_letter}2:{status_letter}"],
+            major_dimension='COLUMNS'
         )
-        service = build('sheets', 'v4', credentials=credentials)
-        
-        # Get formatting from reference row (932)
-        response = service.spreadsheets().get(
-            spreadsheetId=config["google_sheets"]["spreadsheet_id"],
-            ranges=['Sheet1!A932:G932'],
-            includeGridData=True
-        ).execute()
-        
-        reference_color = None
-        if 'sheets' in response and len(response['sheets']) > 0:
-            sheet_data = response['sheets'][0]
-            if 'data' in sheet_data and len(sheet_data['data']) > 0:
-                grid_data = sheet_data['data'][0]
-                if 'rowData' in grid_data and len(grid_data['rowData']) > 0:
-                    row_data = grid_data['rowData'][0]
-                    if 'values' in row_data and len(row_data['values']) > 0:
-                        cell_data = row_data['values'][0]
-                        if 'effectiveFormat' in cell_data and 'backgroundColor' in cell_data['effectiveFormat']:
-                            reference_color = cell_data['effectiveFormat']['backgroundColor']
-                            print(f"✅ Found reference orange color: {reference_color}")
-        
-        if not reference_color:
-            print("⚠️  Could not get reference color, using default orange")
-            reference_color = {"red": 1.0, "green": 0.8, "blue": 0.4, "alpha": 1.0}
-        
-        # Now find ALL entries for NES01-5541
-        print(f"\n🔍 Finding ALL entries for NES01-5541...")
-        
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
-        all_values = worksheet.get_all_values()
-        headers = all_values[0]
-        
-        # Find column indices
-        date_col = sheets_reader._find_column_index(headers, ['date'])
-        hours_col = sheets_reader._find_column_index(headers, ['hours'])
-        category_col = sheets_reader._find_column_index(headers, ['category'])
-        task_col = sheets_reader._find_column_index(headers, ['task', 'work', 'task/work'])
-        persons_col = sheets_reader._find_column_index(headers, ['persons'])
-        invoice_col = sheets_reader._find_column_index(headers, ['invoice'])
-        status_col = sheets_reader._find_column_index(headers, ['paid', 'status'])
-        
-        nes_5541_entries = []
-        
-        for row_idx, row in enumerate(all_values[1:], start=2):
-            if len(row) > max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, status_col):
-                invoice = row[invoice_col].strip() if invoice_col < len(row) else ""
-                status = row[status_col].strip().upper() if status_col < len(row) else ""
+        
+        # Look for entries with the invoice number that are still WIP,
+        # filtering the two columns side by side in a single comprehension
+        invoices = invoice_column[0] if invoice_column else []
+        statuses = status_column[0] if status_column else []
+        matching_rows = [
+            row_idx
+            for row_idx, (invoice, status) in enumerate(zip(invoices, statuses), start=2)
+            if cell_text(invoice) == invoice_number and cell_text(status).upper() == TARGET_STATUS
+        ]
+        
+        # Extract all seven columns of a row with a single call
+        column_keys = ("date", "hours", "category", "task", "persons", "invoice", "status")
+        row_getter = operator.itemgetter(*(columns[key] for key in column_keys))
+        width = max(columns[key] for key in column_keys) + 1
+        
+        rows = sheets_reader.get_rows(matching_rows, "Sheet1", rowcol_to_a1(1, width)[:-1])
+        
+        # Pad every row once so the getter never runs past a short row
+        rows = {row_idx: (row + [''] * width)[:width] for row_idx, row in rows.items()}
+        
+        invoice_entries = []
+        out = []
+        
+        for row_idx in matching_rows:
+            row = rows[row_idx]
+            date, hours_value, category, task, persons, invoice, status = row_getter(row)
+            hours = cell_hours(hours_value) or 0.0
+            
+            if hours > 0:
+                entry = {
+                    "date": cell_text(date),
+                    "hours": hours,
+                    "category": cell_text(category),
+                    "description": cell_text(task),
+                    "persons": cell_text(persons),
+                    "invoice": invoice_number,
+                    "row_number": row_idx
+                }
+                invoice_entries.append(entry)
                 
-                # Look for entries with NES01-5541 invoice number that are still WIP
-                if invoice == "NES01-5541" and status == "WIP":
-                    try:
-                        hours_str = row[hours_col].strip() if hours_col < len(row) else "0"
-                        hours = float(hours_str)
-                        
-                        if hours > 0:
-                            entry = {
-                                "date": row[date_col].strip() if date_col < len(row) else "",
-                                "hours": hours,
-                                "category": row[category_col].strip() if category_col < len(row) else "Enhancement",
-                                "description": row[task_col].strip() if task_col < len(row) else "",
-                                "persons": row[persons_col].strip() if persons_col < len(row) else "",
-                                "invoice": "NES01-5541",
-                                "row_number": row_idx
-                            }
-                            nes_5541_entries.append(entry)
-                            
-                            print(f"Row {row_idx}: {entry['date']} | {entry['hours']}h | {entry['description'][:50]}... | Status: {status}")
-                            
-                    except ValueError:
-                        continue
-        
-        if not nes_5541_entries:
-            print("ℹ️  No remaining WIP entries found for NES01-5541")
+                out.append(f"Row {row_idx}: {entry['date']} | {entry['hours']}h | {entry['description'][:50]}... | Status: {cell_text(status).upper()}")
+        
+        if out:
+            sys.stdout.write('\n'.join(out) + '\n')
+        
+        if not invoice_entries:
+            print(f"ℹ️  No remaining WIP entries found for {invoice_number}")
             return True
         
-        print(f"\n📊 Found {len(nes_5541_entries)} remaining WIP entries for NES01-5541")
-        total_hours = sum(entry["hours"] for entry in nes_5541_entries)
+        print(f"\n📊 Found {len(invoice_entries)} remaining WIP entries for {invoice_number}")
+        total_hours = sum(entry["hours"] for entry in invoice_entries)
         print(f"⏱️  Total Hours: {total_hours}")
         
-        # Ask for confirmation to fix all entries
-        print(f"\n🔧 Fix ALL {len(nes_5541_entries)} entries for NES01-5541 with correct orange color? (y/n): ", end="")
-        response = input().strip().lower()
+        if dry_run:
+            print("ℹ️  Dry run: no changes made")
+            return True
+        
+        # Ask for confirmation to fix all entries unless --yes was given
+        if assume_yes:
+            response = "yes"
+        else:
+            print(f"\n🔧 Fix ALL {len(invoice_entries)} entries for {invoice_number} with correct orange color? (y/n): ", end="")
+            response = input().strip().lower()
         
         if response in ['y', 'yes']:
-            print("🔧 Fixing ALL NES01-5541 entries with correct orange color...")
+            print(f"🔧 Fixing ALL {invoice_number} entries with correct orange color...")
             
             # Update using the correct reference color
             success = update_entries_with_correct_color(
                 sheets_reader, 
-                nes_5541_entries, 
+                invoice_entries, 
+                headers,
                 reference_color,
                 config["google_sheets"]["credentials_path"],
                 config["google_sheets"]["spreadsheet_id"]
             )
             
             if success:
-                print("✅ Successfully fixed ALL NES01-5541 entries with correct orange color")
+                print(f"✅ Successfully fixed ALL {invoice_number} entries with correct orange color")
                 print("🎨 All rows should now match the reference formatting exactly")
                 return True
             else:
@@ -143,74 +160,23 @@ def get_reference_color_and_find_all_entries():
         print(f"❌ Error: {e}")
         return False
 
-def update_entries_with_correct_color(sheets_reader, entries, reference_color, credentials_path, spreadsheet_id):
+def update_entries_with_correct_color(sheets_reader, entries, headers, reference_color, credentials_path, spreadsheet_id):
     """Update entries with the exact reference color."""
     try:
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
-        
-        # Get headers to find the 'Status' column
-        headers = worksheet.row_values(1)
-        status_col_index = sheets_reader._find_column_index(headers, ['paid', 'status']) + 1
-        
-        # Prepare batch updates
-        value_updates = []
-        format_requests = []
-        
-        for entry in entries:
-            row_number = entry.get("row_number")
-            if row_number:
-                # Update the 'Status' column to 'Billed'
-                cell_address = f"{chr(64 + status_col_index)}{row_number}"
-                value_updates.append({
-                    'range': cell_address,
-                    'values': [['Billed']]
-                })
-                
-                # Create format request for the entire row (columns A through G)
-                format_request = {
-                    "repeatCell": {
-                        "range": {
-                            "sheetId": 0,  # Assuming first sheet
-                            "startRowIndex": row_number - 1,  # 0-based for API
-                            "endRowIndex": row_number,
-                            "startColumnIndex": 0,  # Column A
-                            "endColumnIndex": 7   # Column G (0-based, so 7 means up to column G)
-                        },
-                        "cell": {
-                            "userEnteredFormat": {
-                                "backgroundColor": reference_color
-                            }
-                        },
-                        "fields": "userEnteredFormat.backgroundColor"
-                    }
-                }
-                format_requests.append(format_request)
+        # Reuse the headers already fetched to find the 'Status' column (0-based for the API)
+        status_col_index = column_map(tuple(headers))["status"]
         
-        if value_updates:
-            # Batch update values
-            worksheet.batch_update(value_updates)
-            print(f"✅ Updated {len(value_updates)} entries from WIP to Billed")
-            
-            # Apply formatting using the Sheets API
-            if format_requests:
-                body = {
-                    "requests": format_requests
-                }
-                
-                # Build the Sheets API service
-                credentials = Credentials.from_service_account_file(
-                    credentials_path, 
-                    scopes=['https://www.googleapis.com/auth/spreadsheets', 'https://www.googleapis.com/auth/drive']
-                )
-                service = build('sheets', 'v4', credentials=credentials)
-                
-                service.spreadsheets().batchUpdate(
-                    spreadsheetId=spreadsheet_id,
-                    body=body
-                ).execute()
-                
-                print(f"🎨 Applied correct orange highlighting to {len(format_requests)} rows")
+        # Status values and reference-color highlighting go into one spreadsheets.batchUpdate
+        row_numbers = [entry["row_number"] for entry in entries if entry.get("row_number")]
+        updated_count = len(row_numbers)
+        requests = billed_update_requests(row_numbers, status_col_index, reference_color)
+        
+        if requests:
+            # Status values and highlighting are applied together in one atomic call
+            execute_batch_update(credentials_path, spreadsheet_id, requests)
             
+            print(f"✅ Updated {updated_count} entries from WIP to Billed")
+            print(f"🎨 Applied correct orange highlighting to {updated_count} rows")
             return True
         
         return False
@@ -220,5 +186,20 @@ def update_entries_with_correct_color(sheets_reader, entries, reference_color, c
         return False
 
 if __name__ == "__main__":
-    get_reference_color_and_find_all_entries()
-
+    parser = argparse.ArgumentParser(description="Mark remaining WIP entries of an invoice as Billed with the reference color")
+    parser.add_argument("--invoice", default=TARGET_INVOICE,
+                        help=f"Invoice number to fix (default: {TARGET_INVOICE})")
+    parser.add_argument("--yes", action="store_true",
+                        help="Apply the fix without asking for confirmation")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the matching entries without updating the spreadsheet")
+    parser.add_argument("--refresh-ref-color", action="store_true",
+                        help="Re-read the reference row color instead of using the cached one")
+    args = parser.parse_args()
+    
+    get_reference_color_and_find_all_entries(
+        invoice_number=args.invoice,
+        refresh_ref_color=args.refresh_ref_color,
+        assume_yes=args.yes,
+        dry_run=args.dry_run
+    )
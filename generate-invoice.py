@@ -1,4 +1,4 @@
-#!/bin/bash
+#!/usr/bin/env python3
 """
 NES Invoice Generator - Main Command
 Generates professional invoices from WIP data with one command
@@ -36,27 +36,21 @@ def main():
         invoice_generator = InvoiceGenerator(config_path)
         pdf_converter = PDFConverter()
         
-        # Get WIP entries
-        wip_entries = sheets_reader.get_wip_entries()
+        # Get WIP entries and the invoice number in one read
+        wip_entries, invoice_number = sheets_reader.get_wip_entries_and_invoice_number()
         
         if not wip_entries:
             print("❌ No WIP entries found in Google Sheets")
             return 1
         
         print(f"✅ Found {len(wip_entries)} WIP entries")
-        
-        # Get invoice number
-        invoice_number = sheets_reader.get_invoice_number(wip_entries)
         print(f"📄 Generating Invoice: {invoice_number}")
         
         # Generate invoice data
         invoice_data = invoice_generator.generate_invoice(wip_entries, invoice_number)
         
-        # Generate HTML
-        html_content = invoice_generator.generate_html(invoice_data)
-        
-        # Save files
-        files_created = invoice_generator.save_files(invoice_data, html_content)
+        # Save files (the HTML is rendered straight into its output file)
+        files_created = invoice_generator.save_files(invoice_data)
         
         # Generate PDF if requested
         if config["output"]["generate_pdf"] and "html" in files_created:
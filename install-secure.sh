@@ -17,7 +17,7 @@ sudo apt-get install -y wkhtmltopdf
 
 # Install required Python packages
 echo "📚 Installing Python packages..."
-pip3 install --upgrade gspread google-auth google-auth-oauthlib google-auth-httplib2
+pip3 install --upgrade gspread google-auth google-auth-oauthlib google-auth-httplib2 google-api-python-client jinja2 "httpx[http2]" orjson
 
 # Create credentials directory
 echo "📁 Creating credentials directory..."
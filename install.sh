@@ -22,7 +22,7 @@ sudo apt-get install -y python3 python3-pip wkhtmltopdf git
 
 # Install Python dependencies
 echo "🐍 Installing Python dependencies..."
-pip3 install --user requests beautifulsoup4
+pip3 install --user requests beautifulsoup4 jinja2
 
 # Make scripts executable
 chmod +x generate-invoice
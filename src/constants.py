@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Constants - Values shared by the invoice generator scripts
+"""
+
+import os
+
+# Background colour of billed rows (matches the reference rows 932-938)
+BILLED_ORANGE = {"red": 1.0, "green": 0.6, "blue": 0.0}
+
+# Reference cell (first cell of row 932) whose background colour marks billed entries
+REFERENCE_COLOR_RANGE = "Sheet1!A932"
+
+# On-disk cache of the reference colour and how long it stays valid (seconds)
+REFERENCE_COLOR_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "invoice-generator", "ref_color.json")
+REFERENCE_COLOR_TTL = 24 * 60 * 60
+
+# Local snapshot of sheet reads, reused while the spreadsheet is unchanged
+SHEET_SNAPSHOT_CACHE = os.path.join(".cache", "sheet_snapshot.json")
+
+# Render options for value reads: numbers come back as JSON numbers, dates as displayed
+VALUE_RENDER_OPTION = "UNFORMATTED_VALUE"
+DATE_TIME_RENDER_OPTION = "FORMATTED_STRING"
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Google API Clients - Shared service account credentials and Sheets API service
+"""
+
+import functools
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.model import JsonModel
+
+try:
+    import httpx
+except ImportError:  # Optional: reads fall back to the googleapiclient transport
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # Optional: request and response bodies use the stdlib json module
+    orjson = None
+
+# Scopes required for Google Sheets and Drive access
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# Transient API errors are retried with exponential backoff (capped, with jitter)
+RETRY_STATUS_CODES = (429, 500, 503)
+RETRY_ATTEMPTS = 6
+RETRY_MAX_DELAY = 60
+
+# Sheets REST endpoint used by the HTTP/2 read path
+SHEETS_API_URL = 'https://sheets.googleapis.com/v4/spreadsheets'
+
+# Serializes access token refreshes across threads
+_token_lock = threading.Lock()
+
+class OrjsonModel(JsonModel):
+    """JsonModel that encodes request bodies and decodes responses with orjson."""
+    
+    def serialize(self, body_value):
+        if (
+            isinstance(body_value, dict)
+            and "data" not in body_value
+            and self._data_wrapper
+        ):
+            body_value = {"data": body_value}
+        return orjson.dumps(body_value).decode("utf-8")
+    
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().deserialize(content)
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
+def _error_status(error: BaseException) -> Optional[int]:
+    """
+    Find the HTTP status behind an API error.
+    
+    Handles gspread APIError and httpx HTTPStatusError (response.status_code)
+    and googleapiclient HttpError (resp.status). The readers re-raise API errors
+    as plain Exceptions, so the chained cause/context is searched as well.
+    """
+    while error is not None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+        if status is None:
+            status = getattr(getattr(error, 'resp', None), 'status', None)
+        if status is not None:
+            return int(status)
+        error = error.__cause__ or error.__context__
+    return None
+
+def with_retry(fn: Callable, *args, **kwargs):
+    """
+    Call fn, retrying rate limit (429) and transient server (500/503) errors.
+    
+    Waits 1, 2, 4, ... seconds (capped at RETRY_MAX_DELAY) plus up to a second
+    of jitter between attempts, and gives up after RETRY_ATTEMPTS attempts.
+    
+    Args:
+        fn: Callable that performs the API request
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+        
+    Returns:
+        Whatever fn returns
+    """
+    for attempt in range(RETRY_ATTEMPTS):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            status = _error_status(e)
+            if status not in RETRY_STATUS_CODES or attempt == RETRY_ATTEMPTS - 1:
+                raise
+            delay = min(RETRY_MAX_DELAY, 2 ** attempt) + random.random()
+            print(f"⚠️  Google API returned {status}, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def _json_model() -> Optional[JsonModel]:
+    """Model passed to build(): orjson-backed when available, else the googleapiclient default."""
+    return OrjsonModel() if orjson is not None else None
+
+@functools.lru_cache(maxsize=1)
+def get_credentials(credentials_path: str) -> Credentials:
+    """Load service account credentials once per process."""
+    return Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+
+@functools.lru_cache(maxsize=1)
+def get_sheets_service(credentials_path: str):
+    """
+    Build the Sheets v4 service once per process.
+
+    Uses the discovery document bundled with google-api-python-client, so no
+    discovery fetch is made at startup.
+    """
+    return build(
+        'sheets', 'v4',
+        credentials=get_credentials(credentials_path),
+        cache_discovery=False,
+        static_discovery=True,
+        model=_json_model()
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_drive_service(credentials_path: str):
+    """Build the Drive v3 service once per process (used for file revision checks)."""
+    return build(
+        'drive', 'v3',
+        credentials=get_credentials(credentials_path),
+        cache_discovery=False,
+        static_discovery=True,
+        model=_json_model()
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_http2_client() -> Optional["httpx.Client"]:
+    """
+    Build the shared HTTP/2 client used for value reads.
+    
+    Returns None when httpx or its h2 extra is not installed, in which case
+    callers use the googleapiclient service instead.
+    """
+    if httpx is None:
+        return None
+    try:
+        return httpx.Client(http2=True, headers={'Accept-Encoding': 'gzip'}, timeout=60.0)
+    except ImportError:  # httpx is installed without the 'http2' extra
+        return None
+
+def _bearer_token(credentials_path: str) -> str:
+    """Return a valid access token for the service account, refreshing it if needed."""
+    credentials = get_credentials(credentials_path)
+    with _token_lock:
+        if not credentials.valid:
+            credentials.refresh(Request())
+        return credentials.token
+
+def _http2_get(credentials_path: str, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """GET a Sheets REST URL over the shared HTTP/2 client and decode the JSON body."""
+    response = get_http2_client().get(
+        url,
+        params=params,
+        headers={'Authorization': f'Bearer {_bearer_token(credentials_path)}'}
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content) if orjson is not None else response.json()
+
+def values_get(credentials_path: str, spreadsheet_id: str, range_a1: str, **params) -> Dict[str, Any]:
+    """
+    Call spreadsheets.values.get.
+    
+    Goes over HTTP/2 with gzip when httpx is available, otherwise through the
+    googleapiclient service.
+    
+    Args:
+        credentials_path: Path to service account JSON credentials file
+        spreadsheet_id: Google Sheets spreadsheet ID
+        range_a1: Range in A1 notation
+        **params: Extra query parameters (e.g. valueRenderOption)
+        
+    Returns:
+        The ValueRange response
+    """
+    if get_http2_client() is None:
+        return get_sheets_service(credentials_path).spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=range_a1,
+            **params
+        ).execute()
+    
+    url = f"{SHEETS_API_URL}/{spreadsheet_id}/values/{quote(range_a1, safe='')}"
+    return _http2_get(credentials_path, url, params)
+
+def values_batch_get(credentials_path: str, spreadsheet_id: str, ranges: List[str], **params) -> Dict[str, Any]:
+    """
+    Call spreadsheets.values.batchGet.
+    
+    Goes over HTTP/2 with gzip when httpx is available, otherwise through the
+    googleapiclient service.
+    
+    Args:
+        credentials_path: Path to service account JSON credentials file
+        spreadsheet_id: Google Sheets spreadsheet ID
+        ranges: Ranges in A1 notation
+        **params: Extra query parameters (e.g. majorDimension)
+        
+    Returns:
+        The batchGet response with one ValueRange per range
+    """
+    if get_http2_client() is None:
+        return get_sheets_service(credentials_path).spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=ranges,
+            **params
+        ).execute()
+    
+    url = f"{SHEETS_API_URL}/{spreadsheet_id}/values:batchGet"
+    return _http2_get(credentials_path, url, dict(params, ranges=ranges))
+
+def execute_batch_update(credentials_path: str, spreadsheet_id: str, requests: List[Dict[str, Any]]):
+    """
+    Send spreadsheets.batchUpdate requests as one atomic call.
+    
+    Sheets applies all requests or none, so a row's status value and its
+    highlight can never end up half-applied. Transient errors are retried.
+    
+    Args:
+        credentials_path: Path to service account JSON credentials file
+        spreadsheet_id: Google Sheets spreadsheet ID
+        requests: Sheets API request objects
+    """
+    if not requests:
+        return
+    
+    with_retry(get_sheets_service(credentials_path).spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet_id,
+        body={"requests": requests}
+    ).execute)
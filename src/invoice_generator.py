@@ -6,26 +6,113 @@ Generates professional invoices from WIP data with W3EVOLUTIONS branding
 
 import json
 import base64
+import copy
+import functools
 import os
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import IO, List, Dict, Any, Optional, Tuple
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+try:
+    import orjson
+except ImportError:  # Optional: compact JSON falls back to the stdlib encoder
+    orjson = None
+
+try:
+    from pybase64 import b64encode_as_string
+except ImportError:  # Optional: fall back to the stdlib encoder
+    def b64encode_as_string(data: bytes) -> str:
+        return base64.b64encode(data).decode('ascii')
+
+# Invoice HTML templates live in templates/ at the project root
+PROJECT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+TEMPLATES_DIR = os.path.join(PROJECT_ROOT, 'templates')
+
+# Compiled templates are cached here so later runs skip parsing and compiling
+TEMPLATE_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'jinja')
+
+# Company logo and its cached base64 data URL
+LOGO_PATH = "assets/logo.png"
+LOGO_CACHE_PATH = "assets/logo.b64"
+
+# Write buffer for streamed HTML output (bytes)
+HTML_WRITE_BUFFER = 1 << 16
+
+# Categories that always get a line item (empty if not used, to maintain format)
+ALL_CATEGORIES = ["Enhancement", "New Development"]
+
+def _template_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """Bytecode cache for compiled templates, or None if the cache directory cannot be created."""
+    try:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(directory=TEMPLATE_CACHE_DIR)
+
+# Template environment shared by every InvoiceGenerator
+_ENV = Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    bytecode_cache=_template_bytecode_cache(),
+    autoescape=select_autoescape(['html']),
+    trim_blocks=True,
+    lstrip_blocks=True
+)
 
 class InvoiceGenerator:
+    # Compiled once at import and shared by all instances
+    template = _ENV.get_template("invoice_template.html")
+    
     def __init__(self, config_path: str = "config.json"):
         """Initialize the invoice generator with configuration."""
+        config, self.logo_data_url = self._load_cfg(config_path)
+        
+        # Each instance gets its own copy so callers can adjust settings safely
+        self.config = copy.deepcopy(config)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=4)
+    def _load_cfg(config_path: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Load the configuration and the logo data URL once per process.
+        
+        Generating several invoices in one run reuses both instead of re-reading
+        them for every InvoiceGenerator.
+        """
         with open(config_path, 'r') as f:
-            self.config = json.load(f)
+            config = json.load(f)
         
-        # Load logo as base64
-        self.logo_base64 = self._load_logo()
+        return config, InvoiceGenerator._load_logo()
     
-    def _load_logo(self) -> str:
-        """Load the W3EVOLUTIONS logo as base64."""
-        logo_path = "assets/logo.png"
-        if os.path.exists(logo_path):
-            with open(logo_path, 'rb') as f:
-                return base64.b64encode(f.read()).decode('utf-8')
-        return ""
+    @staticmethod
+    def _load_logo() -> str:
+        """
+        Load the W3EVOLUTIONS logo as a base64 data URL.
+        
+        The encoded data URL is cached in LOGO_CACHE_PATH next to the PNG and
+        only re-encoded when the PNG is newer than the cache.
+        """
+        if not os.path.exists(LOGO_PATH):
+            return ""
+        
+        try:
+            if os.path.getmtime(LOGO_CACHE_PATH) >= os.path.getmtime(LOGO_PATH):
+                with open(LOGO_CACHE_PATH, 'r') as f:
+                    return f.read()
+        except OSError:
+            pass
+        
+        with open(LOGO_PATH, 'rb') as f:
+            logo_data_url = "data:image/png;base64," + b64encode_as_string(f.read())
+        
+        # Write through atomically so a concurrent run never reads a partial file
+        try:
+            tmp_path = f"{LOGO_CACHE_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(logo_data_url)
+            os.replace(tmp_path, LOGO_CACHE_PATH)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not cache encoded logo: {e}")
+        
+        return logo_data_url
     
     def generate_invoice(self, wip_entries: List[Dict], invoice_number: str) -> Dict[str, Any]:
         """Generate invoice from WIP entries."""
@@ -69,233 +156,49 @@ class InvoiceGenerator:
         
         return invoice_data
     
-    def generate_html(self, invoice_data: Dict[str, Any]) -> str:
-        """Generate HTML invoice."""
-        wip_entries = invoice_data["work_entries"]
-        total_hours = invoice_data["summary"]["total_hours"]
-        categories = invoice_data["summary"]["categories"]
-        hourly_rate = invoice_data["summary"]["hourly_rate"]
-        original_rate = invoice_data["summary"]["original_rate"]
-        discount_per_hour = invoice_data["summary"]["discount_per_hour"]
-        subtotal = invoice_data["summary"]["subtotal"]
-        balance_due = invoice_data["summary"]["balance_due"]
-        invoice_date = invoice_data["invoice_date"]
-        invoice_number = invoice_data["invoice_number"]
-        
-        html_content = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Invoice {invoice_number}</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            margin: 20px;
-            color: #333;
-            line-height: 1.4;
-        }}
-        .header {{
-            display: flex;
-            justify-content: space-between;
-            align-items: flex-start;
-            margin-bottom: 30px;
-        }}
-        .logo {{
-            max-width: 300px;
-            height: auto;
-        }}
-        .invoice-title {{
-            font-size: 48px;
-            font-weight: bold;
-            color: #666;
-            text-align: right;
-        }}
-        .invoice-info {{
-            margin-bottom: 20px;
-        }}
-        .invoice-info div {{
-            margin-bottom: 8px;
-        }}
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 20px;
-        }}
-        th, td {{
-            border: 1px solid #ccc;
-            padding: 8px;
-            text-align: left;
-        }}
-        th {{
-            background-color: #f0f0f0;
-            font-weight: bold;
-        }}
-        .amount {{
-            text-align: right;
-        }}
-        .payment-info {{
-            margin: 20px 0;
-            line-height: 1.6;
-        }}
-        .totals-table {{
-            width: 300px;
-            float: right;
-            margin-top: 20px;
-        }}
-        .time-details {{
-            clear: both;
-            margin-top: 40px;
-        }}
-        .time-details h2 {{
-            font-size: 24px;
-            margin-bottom: 15px;
-            color: #333;
-        }}
-    </style>
-</head>
-<body>
-    <div class="header">
-        <img src="data:image/png;base64,{self.logo_base64}" alt="W3EVOLUTIONS" class="logo">
-        <div class="invoice-title">INVOICE</div>
-    </div>
-
-    <div class="invoice-info">
-        <div><strong>Invoice No.:</strong> {invoice_number}</div>
-        <div><strong>Bill To:</strong> {invoice_data['bill_to']['name']}</div>
-        <div>{invoice_data['bill_to']['address']}</div>
-        <div>{invoice_data['bill_to']['city_state_zip']}</div>
-        <div><strong>Customer ID:</strong> {invoice_data['bill_to']['customer_id']}</div>
-    </div>
-
-    <table>
-        <thead>
-            <tr>
-                <th>Date</th>
-                <th>Invoice No.</th>
-                <th>Sales Rep.</th>
-                <th>Ship Via</th>
-                <th>Terms</th>
-                <th>Date Due</th>
-            </tr>
-        </thead>
-        <tbody>
-            <tr>
-                <td>{invoice_date}</td>
-                <td>{invoice_number}</td>
-                <td>{invoice_data['sales_rep']}</td>
-                <td>Email</td>
-                <td>{invoice_data['terms']}</td>
-                <td>-</td>
-            </tr>
-        </tbody>
-    </table>
-
-    <table>
-        <thead>
-            <tr>
-                <th>Quantity</th>
-                <th>Item</th>
-                <th>Description</th>
-                <th>Discount</th>
-                <th>Taxable</th>
-                <th>Unit Price</th>
-                <th>Total</th>
-            </tr>
-        </thead>
-        <tbody>"""
+    def generate_html(self, invoice_data: Dict[str, Any], out: Optional[IO[str]] = None) -> Optional[str]:
+        """
+        Generate HTML invoice.
         
-        # Generate rows for each category
-        for category, hours in categories.items():
-            category_total = hours * hourly_rate
-            html_content += f"""
-            <tr>
-                <td>{hours}</td>
-                <td>{category}</td>
-                <td>See attached</td>
-                <td>${discount_per_hour} / hr off<br>${original_rate} / hr</td>
-                <td>No</td>
-                <td>${hourly_rate}</td>
-                <td>${category_total:,.0f}</td>
-            </tr>"""
+        Args:
+            invoice_data: Invoice data from generate_invoice
+            out: Optional text stream; when given, the HTML is written to it
+                 chunk by chunk instead of being built as one string
+            
+        Returns:
+            The HTML document, or None when it was written to out
+        """
+        # Display strings for the amounts, formatted once per render here rather than
+        # in the template (the saved invoice data keeps the numbers)
+        summary = invoice_data["summary"]
+        amounts = {
+            "categories": {
+                category: f"${hours * summary['hourly_rate']:,.0f}"
+                for category, hours in summary["categories"].items()
+            },
+            "subtotal": f"${summary['subtotal']:,.0f}",
+            "balance_due": f"${summary['balance_due']:,.0f}"
+        }
         
-        # Add empty rows for categories not used (to maintain format)
-        all_categories = ["Enhancement", "New Development"]
-        for category in all_categories:
-            if category not in categories:
-                html_content += f"""
-            <tr>
-                <td>-</td>
-                <td>{category}</td>
-                <td>See attached</td>
-                <td>${discount_per_hour} / hr off<br>${original_rate} / hr</td>
-                <td>No</td>
-                <td>${hourly_rate}</td>
-                <td>-</td>
-            </tr>"""
+        context = {
+            "invoice": invoice_data,
+            "amounts": amounts,
+            "logo_data_url": self.logo_data_url,
+            "all_categories": ALL_CATEGORIES
+        }
+        if out is None:
+            return self.template.render(context)
         
-        html_content += f"""
-        </tbody>
-    </table>
-
-    <div class="payment-info">
-        <strong>Please make all checks payable to:</strong> {invoice_data['payment_info']['name']}<br>
-        <strong>Please send checks to:</strong> {invoice_data['payment_info']['address']}<br>
-        <strong>Zelle:</strong> {invoice_data['payment_info']['zelle']}
-    </div>
-
-    <table class="totals-table">
-        <tbody>
-            <tr>
-                <td><strong>Subtotal:</strong></td>
-                <td class="amount">${subtotal:,.0f}</td>
-            </tr>
-            <tr>
-                <td><strong>Tax:</strong></td>
-                <td class="amount">0.00</td>
-            </tr>
-            <tr>
-                <td><strong>Balance Due:</strong></td>
-                <td class="amount">${balance_due:,.0f}</td>
-            </tr>
-        </tbody>
-    </table>
-
-    <div class="time-details">
-        <h2>Time Entry Details</h2>
-        <table>
-            <thead>
-                <tr>
-                    <th>Date</th>
-                    <th>Hours</th>
-                    <th>Category</th>
-                    <th>Task/Work</th>
-                    <th>Persons</th>
-                </tr>
-            </thead>
-            <tbody>"""
-
-        # Add all time entries
-        for entry in wip_entries:
-            html_content += f"""
-                <tr>
-                    <td>{entry['date']}</td>
-                    <td>{entry['hours']}</td>
-                    <td>{entry.get('category', 'Enhancement')}</td>
-                    <td>{entry['description']}</td>
-                    <td>{entry['persons']}</td>
-                </tr>"""
-
-        html_content += """
-            </tbody>
-        </table>
-    </div>
-</body>
-</html>"""
-
-        return html_content
+        self.template.stream(context).dump(out)
+        return None
     
-    def save_files(self, invoice_data: Dict[str, Any], html_content: str) -> Dict[str, str]:
-        """Save invoice files to output directory."""
+    def save_files(self, invoice_data: Dict[str, Any], html_content: Optional[str] = None) -> Dict[str, str]:
+        """
+        Save invoice files to output directory.
+        
+        The HTML is rendered straight into the output file unless an already
+        rendered html_content is passed in.
+        """
         output_dir = self.config["output"]["output_dir"]
         os.makedirs(output_dir, exist_ok=True)
         
@@ -305,15 +208,25 @@ class InvoiceGenerator:
         # Save HTML
         if self.config["output"]["generate_html"]:
             html_path = f"{output_dir}/{invoice_number}.html"
-            with open(html_path, 'w') as f:
-                f.write(html_content)
+            with open(html_path, 'w', buffering=HTML_WRITE_BUFFER) as f:
+                if html_content is None:
+                    self.generate_html(invoice_data, f)
+                else:
+                    f.write(html_content)
             files_created["html"] = html_path
         
         # Save JSON
         if self.config["output"]["generate_json"]:
             json_path = f"{output_dir}/{invoice_number}.json"
-            with open(json_path, 'w') as f:
-                json.dump(invoice_data, f, indent=2)
+            if self.config["output"].get("json_pretty", False):
+                with open(json_path, 'w') as f:
+                    json.dump(invoice_data, f, indent=2)
+            elif orjson is not None:
+                with open(json_path, 'wb') as f:
+                    f.write(orjson.dumps(invoice_data))
+            else:
+                with open(json_path, 'w') as f:
+                    json.dump(invoice_data, f, separators=(',', ':'))
             files_created["json"] = json_path
         
         return files_created
@@ -3,28 +3,45 @@
 PDF Converter - Converts HTML invoices to PDF format
 """
 
+import shutil
 import subprocess
 import os
 from typing import Optional
 
+try:
+    import weasyprint
+except (ImportError, OSError):  # Optional: missing package or its native libraries
+    weasyprint = None
+
+# Page setup matching the wkhtmltopdf options below (A4, 0.75in margins)
+PAGE_CSS = "@page { size: A4; margin: 0.75in; }"
+
 class PDFConverter:
     def __init__(self):
         """Initialize PDF converter."""
-        pass
+        # Absolute path of wkhtmltopdf, looked up once (None if not installed)
+        self._wkhtmltopdf = shutil.which('wkhtmltopdf')
     
     def html_to_pdf(self, html_path: str, pdf_path: str) -> bool:
-        """Convert HTML file to PDF using wkhtmltopdf."""
+        """
+        Convert HTML file to PDF.
+        
+        Renders in-process with WeasyPrint when it is installed, which avoids
+        starting a wkhtmltopdf process per invoice; otherwise uses wkhtmltopdf.
+        """
+        if weasyprint is not None and self._html_to_pdf_weasyprint(html_path, pdf_path):
+            return True
+        
         try:
             # Check if wkhtmltopdf is available
-            result = subprocess.run(['which', 'wkhtmltopdf'], 
-                                  capture_output=True, text=True)
-            if result.returncode != 0:
+            if not self._wkhtmltopdf:
                 print("Warning: wkhtmltopdf not found. Installing...")
                 self._install_wkhtmltopdf()
+                self._wkhtmltopdf = shutil.which('wkhtmltopdf') or 'wkhtmltopdf'
             
             # Convert HTML to PDF
             cmd = [
-                'wkhtmltopdf',
+                self._wkhtmltopdf,
                 '--page-size', 'A4',
                 '--margin-top', '0.75in',
                 '--margin-right', '0.75in',
@@ -49,6 +66,20 @@ class PDFConverter:
             print(f"❌ PDF conversion error: {e}")
             return False
     
+    def _html_to_pdf_weasyprint(self, html_path: str, pdf_path: str) -> bool:
+        """Convert HTML file to PDF in-process with WeasyPrint."""
+        try:
+            weasyprint.HTML(filename=html_path).write_pdf(
+                pdf_path,
+                stylesheets=[weasyprint.CSS(string=PAGE_CSS)],
+                presentational_hints=True
+            )
+            print(f"✅ PDF generated: {pdf_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️  WeasyPrint conversion failed, falling back to wkhtmltopdf: {e}")
+            return False
+    
     def convert_html_to_pdf(self, html_path: str, invoice_number: str) -> Optional[str]:
         """Convert HTML file to PDF and return the PDF path."""
         try:
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Sheet Utilities - Column lookup and row helpers shared by the sheets readers
+"""
+
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+# Logical column keys and the header names that identify them
+COLUMN_ALIASES = (
+    ("date", ("date",)),
+    ("hours", ("hours",)),
+    ("category", ("category",)),
+    ("task", ("task", "work", "task/work")),
+    ("persons", ("persons",)),
+    ("invoice", ("invoice",)),
+    ("status", ("paid", "status")),
+)
+
+def cell_text(value: Any) -> str:
+    """
+    Read a cell as stripped text.
+    
+    Values are read UNFORMATTED, so a cell can come back as a number or bool
+    instead of a string.
+    """
+    return "" if value is None else str(value).strip()
+
+def cell_hours(value: Any) -> Optional[float]:
+    """
+    Read an hours cell.
+    
+    Numeric hours arrive as numbers (UNFORMATTED_VALUE); hours stored as text
+    (e.g. "2.5") are parsed. Either way the result is a float, as the
+    float() parse of formatted values used to give.
+    
+    Returns:
+        The hours, or None when the cell is blank or not a number
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    try:
+        return float(cell_text(value))
+    except ValueError:
+        return None
+
+@functools.lru_cache(maxsize=8)
+def column_map(headers: Tuple[str, ...]) -> Dict[str, int]:
+    """
+    Map every logical column key to its index in the header row.
+    
+    Args:
+        headers: Header row as a tuple so results are cached per sheet layout
+        
+    Returns:
+        Mapping of column key to index (len(headers) when a column is missing)
+    """
+    headers_lower = [cell_text(h).lower() for h in headers]
+    columns = {}
+    
+    for key, possible_names in COLUMN_ALIASES:
+        columns[key] = next(
+            (headers_lower.index(name) for name in possible_names if name in headers_lower),
+            len(headers)
+        )
+    
+    return columns
+
+def coalesce_row_runs(row_numbers: List[int]) -> List[Tuple[int, int]]:
+    """
+    Merge row numbers into runs of consecutive rows.
+    
+    Args:
+        row_numbers: 1-based sheet row numbers, in any order
+        
+    Returns:
+        List of inclusive (first_row, last_row) tuples in ascending order
+    """
+    runs = []
+    for row_number in sorted(set(row_numbers)):
+        if runs and row_number == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], row_number)
+        else:
+            runs.append((row_number, row_number))
+    return runs
+
+def billed_update_requests(row_numbers: List[int], status_col_index: int,
+                           color: Dict[str, float], sheet_id: int = 0) -> List[Dict[str, Any]]:
+    """
+    Build the spreadsheets.batchUpdate requests that mark rows as billed.
+    
+    Args:
+        row_numbers: 1-based sheet row numbers to mark, in any order
+        status_col_index: 0-based index of the 'Status' column
+        color: Background color applied to columns A through G
+        sheet_id: Sheet to update (the first sheet by default)
+        
+    Returns:
+        One request per run of consecutive rows setting 'Billed', followed by
+        one request per run applying the highlight
+    """
+    runs = coalesce_row_runs(row_numbers)
+    value_requests = []
+    format_requests = []
+    
+    for first_row, last_row in runs:
+        value_requests.append({
+            "updateCells": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": first_row - 1,  # 0-based for API
+                    "endRowIndex": last_row,
+                    "startColumnIndex": status_col_index,
+                    "endColumnIndex": status_col_index + 1
+                },
+                "rows": [{"values": [{"userEnteredValue": {"stringValue": "Billed"}}]}] * (last_row - first_row + 1),
+                "fields": "userEnteredValue"
+            }
+        })
+        format_requests.append({
+            "repeatCell": {
+                "range": {
+                    "sheetId": sheet_id,
+                    "startRowIndex": first_row - 1,  # 0-based for API
+                    "endRowIndex": last_row,
+                    "startColumnIndex": 0,  # Column A
+                    "endColumnIndex": 7   # Column G (0-based, so 7 means up to column G)
+                },
+                "cell": {
+                    "userEnteredFormat": {
+                        "backgroundColor": color
+                    }
+                },
+                "fields": "userEnteredFormat.backgroundColor"
+            }
+        })
+    
+    return value_requests + format_requests
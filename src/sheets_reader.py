@@ -4,7 +4,7 @@ Google Sheets Reader - Extracts WIP data from time tracking spreadsheet
 """
 
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 class SheetsReader:
     def __init__(self, sheets_url: str):
@@ -85,4 +85,14 @@ class SheetsReader:
         if wip_entries:
             return wip_entries[0].get("invoice", "NES01-5541")
         return "NES01-5541"
-
+    
+    def get_wip_entries_and_invoice_number(self) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Extract WIP entries, then take the invoice number from those entries.
+        get_invoice_number reads nothing itself, so no second lookup is made.
+        
+        Returns:
+            Tuple of (wip_entries, invoice_number)
+        """
+        wip_entries = self.get_wip_entries()
+        return wip_entries, self.get_invoice_number(wip_entries)
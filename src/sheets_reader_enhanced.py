@@ -6,8 +6,64 @@ Enhanced Sheets Reader with formatting capabilities for updating billed entries
 import gspread
 import json
 import os
-from typing import List, Dict, Any, Optional
-from google.oauth2.service_account import Credentials
+import time
+from collections import Counter
+from typing import Iterable, List, Dict, Any, Optional
+import google_clients
+from google_clients import SCOPES, get_credentials, get_sheets_service, get_drive_service, with_retry
+from constants import BILLED_ORANGE, REFERENCE_COLOR_RANGE, REFERENCE_COLOR_CACHE, REFERENCE_COLOR_TTL, SHEET_SNAPSHOT_CACHE
+from constants import VALUE_RENDER_OPTION, DATE_TIME_RENDER_OPTION
+from sheet_utils import billed_update_requests, cell_hours, cell_text, coalesce_row_runs, column_map
+
+def get_billed_color(credentials_path: str, spreadsheet_id: str, refresh: bool = False) -> Dict[str, float]:
+    """
+    Get the background colour used for billed rows.
+    
+    Only the background colour of the single reference cell is requested.
+    The colour is cached on disk for REFERENCE_COLOR_TTL
+    seconds, so the includeGridData request (the heaviest Sheets read) only
+    runs when the cache is missing, stale or a refresh is requested.
+    
+    Args:
+        credentials_path: Path to service account JSON credentials file
+        spreadsheet_id: Google Sheets spreadsheet ID
+        refresh: Re-read the reference row even if the cache is fresh
+        
+    Returns:
+        Sheets API colour dict (BILLED_ORANGE if the reference cell has none)
+    """
+    if not refresh:
+        try:
+            with open(REFERENCE_COLOR_CACHE, 'r') as f:
+                cached = json.load(f)
+            if (cached.get("spreadsheet_id") == spreadsheet_id
+                    and time.time() - cached.get("fetched_at", 0) < REFERENCE_COLOR_TTL):
+                return cached["color"]
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    response = get_sheets_service(credentials_path).spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        ranges=[REFERENCE_COLOR_RANGE],
+        includeGridData=True,
+        fields='sheets.data.rowData.values.effectiveFormat.backgroundColor'
+    ).execute()
+    
+    color = BILLED_ORANGE
+    try:
+        cell_data = response['sheets'][0]['data'][0]['rowData'][0]['values'][0]
+        color = cell_data['effectiveFormat']['backgroundColor']
+    except (KeyError, IndexError):
+        print("⚠️  Could not get reference color, using default orange")
+    
+    try:
+        os.makedirs(os.path.dirname(REFERENCE_COLOR_CACHE), exist_ok=True)
+        with open(REFERENCE_COLOR_CACHE, 'w') as f:
+            json.dump({"spreadsheet_id": spreadsheet_id, "fetched_at": time.time(), "color": color}, f)
+    except OSError as e:
+        print(f"⚠️  Warning: Could not cache reference color: {e}")
+    
+    return color
 
 class SheetsReaderEnhanced:
     def __init__(self, credentials_path: str, spreadsheet_id: str):
@@ -22,12 +78,25 @@ class SheetsReaderEnhanced:
         self.spreadsheet_id = spreadsheet_id
         self.client = None
         self.spreadsheet = None
+        self._credentials = None
+        self._sheets_service = None
+        
+        # Worksheet values read by _load_sheet, keyed by worksheet name
+        self._sheet_cache: Dict[str, List[List[Any]]] = {}
+        
+        # Header rows read by get_headers, keyed by worksheet name
+        self._headers: Dict[str, List[Any]] = {}
+        
+        # Spreadsheet metadata returned by get_spreadsheet_info
+        self._spreadsheet_info: Optional[Dict[str, Any]] = None
         
-        # Define the required scopes for Google Sheets and Drive access
-        self.scopes = [
-            'https://www.googleapis.com/auth/spreadsheets',
-            'https://www.googleapis.com/auth/drive'
-        ]
+        # Drive version used to validate the local snapshot, looked up once per
+        # reader (None when the lookup failed, e.g. the Drive API is not enabled)
+        self._revision: Optional[str] = None
+        self._revision_checked = False
+        
+        # Required scopes for Google Sheets and Drive access
+        self.scopes = SCOPES
         
         self._authenticate()
     
@@ -37,14 +106,14 @@ class SheetsReaderEnhanced:
             if not os.path.exists(self.credentials_path):
                 raise FileNotFoundError(f"Credentials file not found: {self.credentials_path}")
             
-            # Load credentials from service account JSON file
-            credentials = Credentials.from_service_account_file(
-                self.credentials_path, 
-                scopes=self.scopes
-            )
+            # Load credentials from service account JSON file (shared with the Sheets API service)
+            self._credentials = get_credentials(self.credentials_path)
             
             # Create gspread client with authenticated credentials
-            self.client = gspread.authorize(credentials)
+            self.client = gspread.authorize(self._credentials)
+            
+            # Sheets v4 service for batchUpdate calls, built once and reused
+            self._sheets_service = get_sheets_service(self.credentials_path)
             
             # Open the spreadsheet by ID
             self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
@@ -78,11 +147,8 @@ class SheetsReaderEnhanced:
             List of WIP entries with their details
         """
         try:
-            # Get the specified worksheet
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            
-            # Get all values from the worksheet
-            all_values = worksheet.get_all_values()
+            # Get all values from the worksheet (read once per run, see _load_sheet)
+            all_values = self._load_sheet(worksheet_name)
             
             if not all_values:
                 return []
@@ -90,61 +156,56 @@ class SheetsReaderEnhanced:
             # Assume first row contains headers
             headers = all_values[0]
             
-            # Find column indices
-            date_col = self._find_column_index(headers, ['date'])
-            hours_col = self._find_column_index(headers, ['hours'])
-            category_col = self._find_column_index(headers, ['category'])
-            task_col = self._find_column_index(headers, ['task', 'work', 'task/work'])
-            persons_col = self._find_column_index(headers, ['persons'])
-            invoice_col = self._find_column_index(headers, ['invoice'])
-            paid_col = self._find_column_index(headers, ['paid', 'status'])
+            # Find column indices (cached per header layout)
+            columns = column_map(tuple(headers))
+            date_col = columns["date"]
+            hours_col = columns["hours"]
+            category_col = columns["category"]
+            task_col = columns["task"]
+            persons_col = columns["persons"]
+            invoice_col = columns["invoice"]
+            paid_col = columns["status"]
+            
+            # Rows are padded to the full width by _load_sheet, so a row is only
+            # too short when one of the columns is missing from the headers
+            last_col = max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, paid_col)
+            
+            # Filter on the status column in one pass; only WIP rows (not marked as "Paid") are parsed
+            wip_rows = [
+                (row_idx, row)
+                for row_idx, row in enumerate(all_values[1:], start=2)
+                if len(row) > last_col and cell_text(row[paid_col]).upper() == "WIP"
+            ]
             
             wip_entries = []
             
-            # Process each row (skip header row)
-            for row_idx, row in enumerate(all_values[1:], start=2):
-                if len(row) <= max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, paid_col):
-                    continue  # Skip incomplete rows
-                
-                # Check if this is a WIP entry (not marked as "Paid")
-                paid_status = row[paid_col].strip().upper() if paid_col < len(row) else ""
-                
-                if paid_status == "WIP":
-                    try:
-                        # Extract data from row
-                        date = row[date_col].strip() if date_col < len(row) else ""
-                        hours_str = row[hours_col].strip() if hours_col < len(row) else "0"
-                        category = row[category_col].strip() if category_col < len(row) else "Enhancement"
-                        description = row[task_col].strip() if task_col < len(row) else ""
-                        persons = row[persons_col].strip() if persons_col < len(row) else ""
-                        invoice = row[invoice_col].strip() if invoice_col < len(row) else ""
-                        
-                        # Parse hours (handle decimal values)
-                        try:
-                            hours = float(hours_str)
-                        except ValueError:
-                            print(f"⚠️  Warning: Invalid hours value '{hours_str}' in row {row_idx}, skipping")
-                            continue
-                        
-                        # Skip entries with no hours or invalid data
-                        if hours <= 0 or not date or not description:
-                            continue
-                        
-                        wip_entry = {
-                            "date": date,
-                            "hours": hours,
-                            "category": category,
-                            "description": description,
-                            "persons": persons,
-                            "invoice": invoice,
-                            "row_number": row_idx  # Store row number for potential updates
-                        }
-                        
-                        wip_entries.append(wip_entry)
-                        
-                    except Exception as e:
-                        print(f"⚠️  Warning: Error processing row {row_idx}: {e}")
+            for row_idx, row in wip_rows:
+                try:
+                    hours = cell_hours(row[hours_col])
+                    if hours is None:
+                        print(f"⚠️  Warning: Invalid hours value '{row[hours_col]}' in row {row_idx}, skipping")
+                        continue
+                    
+                    date = cell_text(row[date_col])
+                    description = cell_text(row[task_col])
+                    
+                    # Skip entries with no hours or invalid data
+                    if hours <= 0 or not date or not description:
                         continue
+                    
+                    wip_entries.append({
+                        "date": date,
+                        "hours": hours,
+                        "category": cell_text(row[category_col]),
+                        "description": description,
+                        "persons": cell_text(row[persons_col]),
+                        "invoice": cell_text(row[invoice_col]),
+                        "row_number": row_idx  # Store row number for potential updates
+                    })
+                    
+                except Exception as e:
+                    print(f"⚠️  Warning: Error processing row {row_idx}: {e}")
+                    continue
             
             print(f"📊 Found {len(wip_entries)} WIP entries")
             return wip_entries
@@ -154,17 +215,192 @@ class SheetsReaderEnhanced:
         except Exception as e:
             raise Exception(f"❌ Error reading WIP entries: {e}")
     
-    def _find_column_index(self, headers: List[str], possible_names: List[str]) -> int:
-        """Find the index of a column by checking possible header names."""
-        headers_lower = [h.lower().strip() for h in headers]
+    def _load_sheet(self, worksheet_name: str = "Sheet1") -> List[List[Any]]:
+        """
+        Read the header row and all data of a worksheet in one request.
+        
+        The result is kept for the lifetime of the reader, so the WIP scan and
+        the billing update share a single read; writes drop the cached copy.
+        
+        Args:
+            worksheet_name: Name of the worksheet to read
+            
+        Returns:
+            All rows; shorter rows are padded to the header row's width, so
+            any column found in the headers can be indexed in every row
+            (raises gspread.WorksheetNotFound if the worksheet does not exist)
+        """
+        if worksheet_name not in self._sheet_cache:
+            try:
+                all_values = self.values_batch_get([f"{worksheet_name}!A:Z"])[0]
+            except Exception as e:
+                # The values API reports a missing worksheet as an unparsable range
+                if google_clients._error_status(e) == 400 and "Unable to parse range" in str(e):
+                    raise gspread.WorksheetNotFound(worksheet_name) from e
+                raise
+            width = len(all_values[0]) if all_values else 0
+            self._sheet_cache[worksheet_name] = [row + [''] * (width - len(row)) for row in all_values]
+        return self._sheet_cache[worksheet_name]
+    
+    def get_headers(self, worksheet_name: str = "Sheet1") -> List[Any]:
+        """
+        Get the header row of a worksheet.
+        
+        Uses the cached sheet read when there is one, otherwise fetches only row 1
+        (once per reader; the updates here never write to the header row).
+        
+        Args:
+            worksheet_name: Name of the worksheet to read
+            
+        Returns:
+            Header cell values, in column order
+        """
+        if worksheet_name in self._sheet_cache:
+            all_values = self._sheet_cache[worksheet_name]
+            return all_values[0] if all_values else []
+        
+        if worksheet_name not in self._headers:
+            values = self.values_get(f"{worksheet_name}!1:1")
+            self._headers[worksheet_name] = values[0] if values else []
+        return self._headers[worksheet_name]
+    
+    def values_get(self, range_a1: str) -> List[List[Any]]:
+        """
+        Read a single A1 range through the Sheets API.
         
-        for name in possible_names:
-            name_lower = name.lower().strip()
-            if name_lower in headers_lower:
-                return headers_lower.index(name_lower)
+        Goes straight to values.get with the sheet name in the range, skipping
+        the worksheet metadata lookup that gspread performs. Numeric cells come
+        back as numbers (UNFORMATTED_VALUE); dates stay as displayed.
         
-        # Return last index if not found (will be handled gracefully)
-        return len(headers)
+        Args:
+            range_a1: Range in A1 notation, e.g. 'Sheet1!A:G'
+            
+        Returns:
+            Rows of cell values (trailing empty rows and cells are omitted)
+        """
+        response = google_clients.values_get(
+            self.credentials_path,
+            self.spreadsheet_id,
+            range_a1,
+            valueRenderOption=VALUE_RENDER_OPTION,
+            dateTimeRenderOption=DATE_TIME_RENDER_OPTION
+        )
+        return response.get('values', [])
+    
+    def values_batch_get(self, ranges: List[str], major_dimension: str = "ROWS", use_snapshot: bool = False) -> List[List[List[Any]]]:
+        """
+        Read several A1 ranges in a single values.batchGet request.
+        
+        Numeric cells come back as numbers (UNFORMATTED_VALUE); dates stay as displayed.
+        
+        Args:
+            ranges: Ranges in A1 notation
+            major_dimension: 'ROWS' or 'COLUMNS'
+            use_snapshot: Serve the read from the local snapshot if the
+                spreadsheet has not changed since it was taken
+            
+        Returns:
+            One list of values per requested range, in request order
+        """
+        if use_snapshot:
+            return self._snapshot_batch_get(ranges, major_dimension)
+        
+        response = google_clients.values_batch_get(
+            self.credentials_path,
+            self.spreadsheet_id,
+            ranges,
+            majorDimension=major_dimension,
+            valueRenderOption=VALUE_RENDER_OPTION,
+            dateTimeRenderOption=DATE_TIME_RENDER_OPTION
+        )
+        return [value_range.get('values', []) for value_range in response.get('valueRanges', [])]
+    
+    def _get_revision(self) -> Optional[str]:
+        """
+        Get the Drive version of the spreadsheet, which changes on every edit.
+        
+        Looked up once per reader. Returns None when the lookup fails (for
+        example when the Drive API is not enabled), so callers read directly.
+        """
+        if not self._revision_checked:
+            self._revision_checked = True
+            try:
+                response = get_drive_service(self.credentials_path).files().get(
+                    fileId=self.spreadsheet_id,
+                    fields='version',
+                    supportsAllDrives=True
+                ).execute()
+                self._revision = str(response['version'])
+            except Exception as e:
+                print(f"⚠️  Warning: Could not check the spreadsheet version, reading without the snapshot: {e}")
+                self._revision = None
+        return self._revision
+    
+    def _snapshot_batch_get(self, ranges: List[str], major_dimension: str) -> List[List[List[Any]]]:
+        """
+        values_batch_get backed by SHEET_SNAPSHOT_CACHE.
+        
+        Only a small revision lookup goes over the wire while the spreadsheet
+        is unchanged; any edit bumps the version and discards the snapshot.
+        Falls back to a direct read when the version cannot be looked up.
+        """
+        version = self._get_revision()
+        if version is None:
+            return self.values_batch_get(ranges, major_dimension)
+        
+        key = json.dumps([ranges, major_dimension, VALUE_RENDER_OPTION, DATE_TIME_RENDER_OPTION])
+        
+        snapshot = {}
+        try:
+            with open(SHEET_SNAPSHOT_CACHE, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            pass
+        
+        if snapshot.get("spreadsheet_id") != self.spreadsheet_id or snapshot.get("version") != version:
+            snapshot = {"spreadsheet_id": self.spreadsheet_id, "version": version, "entries": {}}
+        
+        entries = snapshot.setdefault("entries", {})
+        if key in entries:
+            return entries[key]
+        
+        values = self.values_batch_get(ranges, major_dimension)
+        entries[key] = values
+        
+        try:
+            os.makedirs(os.path.dirname(SHEET_SNAPSHOT_CACHE), exist_ok=True)
+            with open(SHEET_SNAPSHOT_CACHE, 'w') as f:
+                json.dump(snapshot, f)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not save sheet snapshot: {e}")
+        
+        return values
+    
+    def get_rows(self, row_numbers: List[int], worksheet_name: str = "Sheet1", last_column: str = "G", use_snapshot: bool = False) -> Dict[int, List[Any]]:
+        """
+        Fetch specific rows, reading each run of consecutive rows as one range.
+        
+        Args:
+            row_numbers: 1-based sheet row numbers to fetch
+            worksheet_name: Name of the worksheet to read from
+            last_column: Last column letter to include (reads start at column A)
+            use_snapshot: Serve the read from the local snapshot when unchanged
+            
+        Returns:
+            Mapping of row number to that row's values
+        """
+        runs = coalesce_row_runs(row_numbers)
+        rows = {}
+        
+        # Cap the number of ranges per request to keep the query string short
+        for i in range(0, len(runs), 100):
+            batch = runs[i:i + 100]
+            ranges = [f"{worksheet_name}!A{first_row}:{last_column}{last_row}" for first_row, last_row in batch]
+            for (first_row, last_row), values in zip(batch, self.values_batch_get(ranges, use_snapshot=use_snapshot)):
+                for offset in range(last_row - first_row + 1):
+                    rows[first_row + offset] = values[offset] if offset < len(values) else []
+        
+        return rows
     
     def get_invoice_number(self, wip_entries: List[Dict[str, Any]]) -> str:
         """
@@ -175,109 +411,52 @@ class SheetsReaderEnhanced:
             return "NES01-5541"  # Default fallback
         
         # Count invoice numbers
-        invoice_counts = {}
-        for entry in wip_entries:
-            invoice = entry.get("invoice", "").strip()
-            if invoice:
-                invoice_counts[invoice] = invoice_counts.get(invoice, 0) + 1
+        invoice_counts = Counter(
+            invoice for invoice in (entry.get("invoice", "").strip() for entry in wip_entries) if invoice
+        )
         
         if invoice_counts:
             # Return the most common invoice number
-            return max(invoice_counts.items(), key=lambda x: x[1])[0]
+            return invoice_counts.most_common(1)[0][0]
         
         return "NES01-5541"  # Default fallback
     
-    def update_wip_to_billed_with_formatting(self, wip_entries: List[Dict[str, Any]], worksheet_name: str = "Sheet1") -> bool:
+    def update_wip_to_billed_with_formatting(self, wip_entries: Iterable[Dict[str, Any]], worksheet_name: str = "Sheet1") -> bool:
         """
         Update WIP entries to 'Billed' status and apply orange highlighting.
         
         Args:
-            wip_entries: List of WIP entries that were billed
+            wip_entries: WIP entries that were billed (iterated once, so a generator is fine)
             worksheet_name: Name of the worksheet to update
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            worksheet = self.spreadsheet.worksheet(worksheet_name)
-            
-            # Get headers to find the 'Status' column
-            headers = worksheet.row_values(1)
-            status_col_index = self._find_column_index(headers, ['paid', 'status']) + 1  # gspread uses 1-based indexing
+            # Get headers to find the 'Status' column (the whole sheet is not needed here)
+            headers = self.get_headers(worksheet_name)
+            status_col_index = column_map(tuple(headers))["status"]  # 0-based for the API
             
-            if status_col_index > len(headers):
+            if status_col_index >= len(headers):
                 print("⚠️  Warning: 'Status' column not found, cannot update status")
                 return False
             
-            # Prepare batch updates for both values and formatting
-            value_updates = []
-            format_requests = []
+            # Status values and orange highlighting (exact reference color) go into one spreadsheets.batchUpdate
+            row_numbers = [entry["row_number"] for entry in wip_entries if entry.get("row_number")]
+            requests = billed_update_requests(row_numbers, status_col_index, BILLED_ORANGE)
             
-            # Orange color for highlighting (use exact reference color)
-            orange_color = {
-                "red": 1,
-                "green": 0.6
-            }
-            
-            for entry in wip_entries:
-                row_number = entry.get("row_number")
-                if row_number:
-                    # Update the 'Status' column to 'Billed'
-                    cell_address = f"{chr(64 + status_col_index)}{row_number}"  # Convert to A1 notation
-                    value_updates.append({
-                        'range': cell_address,
-                        'values': [['Billed']]
-                    })
-                    
-                    # Create format request for the entire row (columns A through G)
-                    format_request = {
-                        "repeatCell": {
-                            "range": {
-                                "sheetId": 0,  # Assuming first sheet
-                                "startRowIndex": row_number - 1,  # 0-based for API
-                                "endRowIndex": row_number,
-                                "startColumnIndex": 0,  # Column A
-                                "endColumnIndex": 7   # Column G (0-based, so 7 means up to column G)
-                            },
-                            "cell": {
-                                "userEnteredFormat": {
-                                    "backgroundColor": orange_color
-                                }
-                            },
-                            "fields": "userEnteredFormat.backgroundColor"
-                        }
-                    }
-                    format_requests.append(format_request)
-            
-            if value_updates:
-                # Batch update values
-                worksheet.batch_update(value_updates)
-                print(f"✅ Updated {len(value_updates)} entries from WIP to Billed")
-                
-                # Apply formatting using the Sheets API
-                if format_requests:
-                    body = {
-                        "requests": format_requests
-                    }
-                    
-                    # Use the underlying service to make the batch update request
-                    from googleapiclient.discovery import build
-                    from google.oauth2.service_account import Credentials
-                    
-                    # Load credentials and build the Sheets API service
-                    credentials = Credentials.from_service_account_file(
-                        self.credentials_path, 
-                        scopes=self.scopes
-                    )
-                    service = build('sheets', 'v4', credentials=credentials)
-                    
-                    service.spreadsheets().batchUpdate(
-                        spreadsheetId=self.spreadsheet_id,
-                        body=body
-                    ).execute()
-                    
-                    print(f"🎨 Applied orange highlighting to {len(format_requests)} rows")
+            if requests:
+                # Status values and highlighting are applied together in one atomic call
+                # (safe to retry: it only sets values and formats)
+                with_retry(self._sheets_service.spreadsheets().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body={"requests": requests}
+                ).execute)
+                self._sheet_cache.pop(worksheet_name, None)
+                self._revision_checked = False
                 
+                print(f"✅ Updated {len(row_numbers)} entries from WIP to Billed")
+                print(f"🎨 Applied orange highlighting to {len(row_numbers)} rows")
                 return True
             
             return False
@@ -287,11 +466,14 @@ class SheetsReaderEnhanced:
             return False
     
     def get_spreadsheet_info(self) -> Dict[str, Any]:
-        """Get basic information about the spreadsheet."""
+        """Get basic information about the spreadsheet (fetched once per reader)."""
+        if self._spreadsheet_info is not None:
+            return self._spreadsheet_info
+        
         try:
             worksheets = self.spreadsheet.worksheets()
             
-            info = {
+            self._spreadsheet_info = info = {
                 "title": self.spreadsheet.title,
                 "id": self.spreadsheet.id,
                 "url": self.spreadsheet.url,
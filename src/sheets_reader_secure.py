@@ -6,8 +6,10 @@ Google Sheets Reader - Secure authenticated access to time tracking spreadsheet
 import gspread
 import json
 import os
+from collections import Counter
 from typing import List, Dict, Any, Optional
 from google.oauth2.service_account import Credentials
+from sheet_utils import coalesce_row_runs
 
 class SheetsReader:
     def __init__(self, credentials_path: str, spreadsheet_id: str):
@@ -22,6 +24,7 @@ class SheetsReader:
         self.spreadsheet_id = spreadsheet_id
         self.client = None
         self.spreadsheet = None
+        self._spreadsheet_info: Optional[Dict[str, Any]] = None
         
         # Define the required scopes for Google Sheets and Drive access
         self.scopes = [
@@ -101,23 +104,26 @@ class SheetsReader:
             
             wip_entries = []
             
+            # Rows shorter than this are missing one of the columns
+            min_cols = max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, paid_col) + 1
+            
             # Process each row (skip header row)
             for row_idx, row in enumerate(all_values[1:], start=2):
-                if len(row) <= max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, paid_col):
+                if len(row) < min_cols:
                     continue  # Skip incomplete rows
                 
                 # Check if this is a WIP entry (not marked as "Paid")
-                paid_status = row[paid_col].strip().upper() if paid_col < len(row) else ""
+                paid_status = row[paid_col].strip().upper()
                 
                 if paid_status == "WIP":
                     try:
-                        # Extract data from row
-                        date = row[date_col].strip() if date_col < len(row) else ""
-                        hours_str = row[hours_col].strip() if hours_col < len(row) else "0"
-                        category = row[category_col].strip() if category_col < len(row) else "Enhancement"
-                        description = row[task_col].strip() if task_col < len(row) else ""
-                        persons = row[persons_col].strip() if persons_col < len(row) else ""
-                        invoice = row[invoice_col].strip() if invoice_col < len(row) else ""
+                        # Extract data from row (every column is present past the length check)
+                        date = row[date_col].strip()
+                        hours_str = row[hours_col].strip()
+                        category = row[category_col].strip()
+                        description = row[task_col].strip()
+                        persons = row[persons_col].strip()
+                        invoice = row[invoice_col].strip()
                         
                         # Parse hours (handle decimal values)
                         try:
@@ -175,15 +181,13 @@ class SheetsReader:
             return "NES01-5541"  # Default fallback
         
         # Count invoice numbers
-        invoice_counts = {}
-        for entry in wip_entries:
-            invoice = entry.get("invoice", "").strip()
-            if invoice:
-                invoice_counts[invoice] = invoice_counts.get(invoice, 0) + 1
+        invoice_counts = Counter(
+            invoice for invoice in (entry.get("invoice", "").strip() for entry in wip_entries) if invoice
+        )
         
         if invoice_counts:
             # Return the most common invoice number
-            return max(invoice_counts.items(), key=lambda x: x[1])[0]
+            return invoice_counts.most_common(1)[0][0]
         
         return "NES01-5541"  # Default fallback
     
@@ -209,22 +213,21 @@ class SheetsReader:
                 print("⚠️  Warning: 'Paid' column not found, cannot update status")
                 return False
             
-            # Update each WIP entry to 'Paid'
-            updates = []
-            for entry in wip_entries:
-                row_number = entry.get("row_number")
-                if row_number:
-                    # Create update for this cell
-                    cell_address = f"{chr(64 + paid_col_index)}{row_number}"  # Convert to A1 notation
-                    updates.append({
-                        'range': cell_address,
-                        'values': [['Paid']]
-                    })
+            # Update the WIP entries to 'Paid', one range per run of consecutive rows
+            paid_column = gspread.utils.rowcol_to_a1(1, paid_col_index)[:-1]  # A1 column letter
+            row_numbers = [entry["row_number"] for entry in wip_entries if entry.get("row_number")]
+            updates = [
+                {
+                    'range': f"{paid_column}{first_row}:{paid_column}{last_row}",
+                    'values': [['Paid']] * (last_row - first_row + 1)
+                }
+                for first_row, last_row in coalesce_row_runs(row_numbers)
+            ]
             
             if updates:
-                # Batch update all cells
+                # Batch update all runs
                 worksheet.batch_update(updates)
-                print(f"✅ Updated {len(updates)} entries from WIP to Paid")
+                print(f"✅ Updated {len(row_numbers)} entries from WIP to Paid")
                 return True
             
             return False
@@ -234,11 +237,14 @@ class SheetsReader:
             return False
     
     def get_spreadsheet_info(self) -> Dict[str, Any]:
-        """Get basic information about the spreadsheet."""
+        """Get basic information about the spreadsheet (fetched once per reader)."""
+        if self._spreadsheet_info is not None:
+            return self._spreadsheet_info
+        
         try:
             worksheets = self.spreadsheet.worksheets()
             
-            info = {
+            self._spreadsheet_info = info = {
                 "title": self.spreadsheet.title,
                 "id": self.spreadsheet.id,
                 "url": self.spreadsheet.url,
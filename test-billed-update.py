@@ -3,19 +3,93 @@
 Test script to check current WIP entries and test the billed formatting update
 """
 
+import argparse
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from sheets_reader_enhanced import SheetsReaderEnhanced
+from sheet_utils import cell_hours, cell_text, column_map
+from google_clients import with_retry
+from gspread.utils import rowcol_to_a1
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Tuple
 import json
 
-def test_billed_update():
-    """Test updating specific rows to Billed status with orange formatting."""
+try:
+    import orjson
+except ImportError:  # Optional: the config is parsed with the stdlib json module
+    orjson = None
+
+# Invoice the WIP entries are billed under unless --invoice is given
+DEFAULT_INVOICE = "NES01-5541"
+
+# Fields of the records yielded by find_wip_entries, in order
+ENTRY_FIELDS = ("row_number", "date", "hours", "category", "description", "persons")
+
+# Entries sent per billed-update request, to keep each payload bounded
+UPDATE_CHUNK_SIZE = 500
+
+def find_wip_status_rows(statuses: List[Any]) -> List[int]:
+    """
+    Find the sheet rows whose status is WIP.
+    
+    Args:
+        statuses: The status column below the header row
+        
+    Returns:
+        1-based sheet row numbers, in ascending order
+    """
+    # Normalize each distinct status once, then select the rows with plain set lookups
+    wip_labels = {status for status in set(statuses) if cell_text(status).upper() == "WIP"}
+    return [i + 2 for i, status in enumerate(statuses) if status in wip_labels]  # Data starts on row 2
+
+def find_wip_entries(rows: Dict[int, List[Any]], entry_cols: List[int]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Yield the billable entries among the fetched WIP rows.
+    
+    Args:
+        rows: Mapping of sheet row number to that row's values (see get_rows)
+        entry_cols: Indices of the date, hours, category, task and persons columns
+        
+    Yields:
+        One (row_number, date, hours, category, description, persons) record per entry
+    """
+    date_col, hours_col, category_col, task_col, persons_col = entry_cols
+    width = max(entry_cols) + 1
+    
+    for row_number in sorted(rows):
+        # Trailing blanks are trimmed by the API, so pad the row to the columns read
+        row = rows[row_number]
+        row = row + [''] * (width - len(row))
+        
+        date = cell_text(row[date_col])
+        if not date:
+            continue
+        
+        hours = cell_hours(row[hours_col])
+        if hours is None:
+            print(f"⚠️  Warning: Invalid hours value '{row[hours_col]}' in row {row_number}, skipping")
+            continue
+        
+        description = cell_text(row[task_col])
+        if hours > 0 and description:
+            yield row_number, date, hours, cell_text(row[category_col]), description, cell_text(row[persons_col])
+
+def test_billed_update(invoice_number=DEFAULT_INVOICE, assume_yes=False, dry_run=False):
+    """
+    Test updating specific rows to Billed status with orange formatting.
+    
+    Args:
+        invoice_number: Invoice number the WIP entries belong to
+        assume_yes: Update the entries without asking for confirmation
+        dry_run: Only list the entries, never write to the spreadsheet
+    """
     try:
         # Load configuration
-        with open("config_secure.json", 'r') as f:
-            config = json.load(f)
+        with open("config_secure.json", 'rb') as f:
+            data = f.read()
+        config = orjson.loads(data) if orjson is not None else json.loads(data)
         
         # Initialize enhanced sheets reader
         sheets_reader = SheetsReaderEnhanced(
@@ -23,77 +97,70 @@ def test_billed_update():
             spreadsheet_id=config["google_sheets"]["spreadsheet_id"]
         )
         
-        print("🔍 Checking for entries that should be marked as Billed for NES01-5541...")
+        print(f"🔍 Checking for entries that should be marked as Billed for {invoice_number}...")
         
-        # Get the worksheet
-        worksheet = sheets_reader.spreadsheet.worksheet("Sheet1")
+        # Find column indices from the header row only (one cached header -> index lookup)
+        columns_by_key = column_map(tuple(with_retry(sheets_reader.get_headers, "Sheet1")))
+        entry_cols = [columns_by_key[key] for key in ("date", "hours", "category", "task", "persons")]
         
-        # Get all values to find the NES01-5541 entries
-        all_values = worksheet.get_all_values()
-        headers = all_values[0]
+        # Read only the status column first (below the header) to find the WIP rows
+        status_letter = rowcol_to_a1(1, columns_by_key["status"] + 1)[:-1]
+        status_column = with_retry(
+            sheets_reader.values_batch_get,
+            [f"Sheet1!{status_letter}2:{status_letter}"],
+            major_dimension="COLUMNS"
+        )[0]
+        wip_row_numbers = find_wip_status_rows(status_column[0] if status_column else [])
         
-        # Find column indices
-        date_col = sheets_reader._find_column_index(headers, ['date'])
-        hours_col = sheets_reader._find_column_index(headers, ['hours'])
-        category_col = sheets_reader._find_column_index(headers, ['category'])
-        task_col = sheets_reader._find_column_index(headers, ['task', 'work', 'task/work'])
-        persons_col = sheets_reader._find_column_index(headers, ['persons'])
-        invoice_col = sheets_reader._find_column_index(headers, ['invoice'])
-        paid_col = sheets_reader._find_column_index(headers, ['paid'])
+        # Then fetch just those rows (one range per run of consecutive rows).
+        # Values are UNFORMATTED, so numeric hours arrive as numbers.
+        last_letter = rowcol_to_a1(1, max(entry_cols) + 1)[:-1]
+        rows = with_retry(sheets_reader.get_rows, wip_row_numbers, "Sheet1", last_letter) if wip_row_numbers else {}
         
-        # Find entries that should be for NES01-5541 (currently WIP)
-        target_entries = []
+        # Find entries that should be for the invoice (recent entries that are still WIP),
+        # kept as parallel columns; dicts are only built for the rows sent to the update
+        target = {field: [] for field in ENTRY_FIELDS}
         
-        for row_idx, row in enumerate(all_values[1:], start=2):
-            if len(row) <= max(date_col, hours_col, category_col, task_col, persons_col, invoice_col, paid_col):
-                continue
+        for record in find_wip_entries(rows, entry_cols):
+            for field, value in zip(ENTRY_FIELDS, record):
+                target[field].append(value)
             
-            # Check if this entry should be for NES01-5541
-            date = row[date_col].strip() if date_col < len(row) else ""
-            paid_status = row[paid_col].strip().upper() if paid_col < len(row) else ""
-            
-            # Look for recent entries that are still WIP (should be for NES01-5541)
-            if paid_status == "WIP" and date:
-                try:
-                    hours_str = row[hours_col].strip() if hours_col < len(row) else "0"
-                    hours = float(hours_str)
-                    category = row[category_col].strip() if category_col < len(row) else "Enhancement"
-                    description = row[task_col].strip() if task_col < len(row) else ""
-                    persons = row[persons_col].strip() if persons_col < len(row) else ""
-                    
-                    if hours > 0 and description:
-                        entry = {
-                            "date": date,
-                            "hours": hours,
-                            "category": category,
-                            "description": description,
-                            "persons": persons,
-                            "invoice": "NES01-5541",
-                            "row_number": row_idx
-                        }
-                        target_entries.append(entry)
-                        
-                        print(f"Row {row_idx}: {date} | {hours}h | {category} | {description[:50]}... | {persons}")
-                        
-                except ValueError:
-                    continue
-        
-        if not target_entries:
-            print("ℹ️  No WIP entries found that should be marked as Billed for NES01-5541")
+            row_idx, date, hours, category, description, persons = record
+            print(f"Row {row_idx}: {date} | {hours}h | {category} | {description[:50]}... | {persons}")
+        
+        num_entries = len(target["row_number"])
+        if not num_entries:
+            print(f"ℹ️  No WIP entries found that should be marked as Billed for {invoice_number}")
             print("💡 This means the entries may have already been updated, or there are no matching entries")
             return True
         
-        print(f"\n📊 Found {len(target_entries)} entries that should be marked as Billed for NES01-5541")
-        total_hours = sum(entry["hours"] for entry in target_entries)
+        print(f"\n📊 Found {num_entries} entries that should be marked as Billed for {invoice_number}")
+        total_hours = sum(target["hours"])
         print(f"⏱️  Total Hours: {total_hours}")
         
-        # Ask for confirmation
-        print(f"\n🔄 Update these {len(target_entries)} entries to 'Billed' status with orange highlighting? (y/n): ", end="")
-        response = input().strip().lower()
+        if dry_run:
+            print("ℹ️  Dry run: no changes made")
+            return True
+        
+        # Ask for confirmation unless --yes was given
+        if assume_yes:
+            response = "yes"
+        else:
+            print(f"\n🔄 Update these {num_entries} entries to 'Billed' status with orange highlighting? (y/n): ", end="")
+            response = input().strip().lower()
         
         if response in ['y', 'yes']:
             print("🔄 Updating entries to Billed with orange highlighting...")
-            success = sheets_reader.update_wip_to_billed_with_formatting(target_entries, "Sheet1")
+            target_entries = (
+                dict(zip(target, values), invoice=invoice_number)
+                for values in zip(*target.values())
+            )
+            
+            # Send the entries in bounded chunks, stopping at the first failed chunk
+            success = all(
+                sheets_reader.update_wip_to_billed_with_formatting(chunk, "Sheet1")
+                for chunk in iter(lambda: list(islice(target_entries, UPDATE_CHUNK_SIZE)), [])
+            )
             if success:
                 print("✅ Successfully updated entries to Billed with orange highlighting")
                 print("🎨 Rows are now highlighted in orange like the example in rows 932-938")
@@ -110,5 +177,14 @@ def test_billed_update():
         return False
 
 if __name__ == "__main__":
-    test_billed_update()
+    parser = argparse.ArgumentParser(description="Mark the current WIP entries as Billed with orange highlighting")
+    parser.add_argument("--invoice", default=DEFAULT_INVOICE,
+                        help=f"Invoice number the WIP entries belong to (default: {DEFAULT_INVOICE})")
+    parser.add_argument("--yes", action="store_true",
+                        help="Update the entries without asking for confirmation")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the entries without updating the spreadsheet")
+    args = parser.parse_args()
+    
+    test_billed_update(invoice_number=args.invoice, assume_yes=args.yes, dry_run=args.dry_run)
 
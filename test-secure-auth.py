@@ -3,18 +3,89 @@
 Test script for secure Google Sheets authentication
 """
 
+import functools
+import io
 import os
 import sys
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: config and credentials are parsed with the stdlib json module
+    orjson = None
 
 # Add src directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-def test_credentials_file():
+CREDENTIALS_PATH = "credentials/service_account_credentials.json"
+CONFIG_PATH = "config_secure.json"
+
+def _read_json(path: str) -> Dict[str, Any]:
+    """Parse a JSON file (orjson.JSONDecodeError subclasses json.JSONDecodeError)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+@functools.lru_cache(maxsize=1)
+def _load_creds() -> Dict[str, Any]:
+    """Parse the service account credentials file once."""
+    return _read_json(CREDENTIALS_PATH)
+
+@functools.lru_cache(maxsize=1)
+def _load_config() -> Dict[str, Any]:
+    """Parse the secure configuration file once."""
+    return _read_json(CONFIG_PATH)
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Stand-in for sys.stdout while the tests run in parallel.
+    
+    Text printed by a thread that has started capturing goes to that thread's
+    buffer, so each test's output can be shown in order afterwards. Everything
+    else is passed through to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def capture(self) -> io.StringIO:
+        """Start capturing the calling thread's output and return its buffer."""
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        return (getattr(self._local, 'buffer', None) or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+def _get_sheets_reader(context: Dict[str, Any]):
+    """Return the SheetsReader shared by the tests, authenticating on first use."""
+    with context["lock"]:
+        if context.get("sheets_reader") is None:
+            from sheets_reader_secure import SheetsReader
+            from google_clients import with_retry
+            
+            config = _load_config()
+            context["sheets_reader"] = with_retry(
+                SheetsReader,
+                credentials_path=config["google_sheets"]["credentials_path"],
+                spreadsheet_id=config["google_sheets"]["spreadsheet_id"]
+            )
+        return context["sheets_reader"]
+
+def test_credentials_file(context: Dict[str, Any]):
     """Test if credentials file exists and is valid JSON."""
     print("🧪 Testing credentials file...")
     
-    credentials_path = "credentials/service_account_credentials.json"
+    credentials_path = CREDENTIALS_PATH
     
     if not os.path.exists(credentials_path):
         print(f"❌ Credentials file not found: {credentials_path}")
@@ -22,8 +93,7 @@ def test_credentials_file():
         return False
     
     try:
-        with open(credentials_path, 'r') as f:
-            creds_data = json.load(f)
+        creds_data = _load_creds()
         
         required_fields = ['type', 'project_id', 'private_key', 'client_email']
         missing_fields = [field for field in required_fields if field not in creds_data]
@@ -49,19 +119,18 @@ def test_credentials_file():
         print(f"❌ Error reading credentials: {e}")
         return False
 
-def test_config_file():
+def test_config_file(context: Dict[str, Any]):
     """Test if configuration file exists and is valid."""
     print("\n🧪 Testing configuration file...")
     
-    config_path = "config_secure.json"
+    config_path = CONFIG_PATH
     
     if not os.path.exists(config_path):
         print(f"❌ Configuration file not found: {config_path}")
         return False
     
     try:
-        with open(config_path, 'r') as f:
-            config = json.load(f)
+        config = _load_config()
         
         # Check required sections
         required_sections = ['google_sheets', 'client', 'company', 'invoice']
@@ -90,25 +159,17 @@ def test_config_file():
         print(f"❌ Error reading configuration: {e}")
         return False
 
-def test_authentication():
+def test_authentication(context: Dict[str, Any]):
     """Test Google Sheets authentication."""
     print("\n🧪 Testing Google Sheets authentication...")
     
     try:
-        from sheets_reader_secure import SheetsReader
-        
-        # Load configuration
-        with open("config_secure.json", 'r') as f:
-            config = json.load(f)
+        from google_clients import with_retry
         
-        # Initialize sheets reader
-        sheets_reader = SheetsReader(
-            credentials_path=config["google_sheets"]["credentials_path"],
-            spreadsheet_id=config["google_sheets"]["spreadsheet_id"]
-        )
+        sheets_reader = _get_sheets_reader(context)
         
         # Get spreadsheet info
-        info = sheets_reader.get_spreadsheet_info()
+        info = with_retry(sheets_reader.get_spreadsheet_info)
         
         print("✅ Authentication successful!")
         print(f"📊 Spreadsheet: {info['title']}")
@@ -128,25 +189,18 @@ def test_authentication():
         print("4. Make sure Google Sheets API is enabled in Google Cloud Console")
         return False
 
-def test_wip_reading():
+def test_wip_reading(context: Dict[str, Any]):
     """Test reading WIP entries from spreadsheet."""
     print("\n🧪 Testing WIP entry reading...")
     
     try:
-        from sheets_reader_secure import SheetsReader
+        from google_clients import with_retry
         
-        # Load configuration
-        with open("config_secure.json", 'r') as f:
-            config = json.load(f)
-        
-        # Initialize sheets reader
-        sheets_reader = SheetsReader(
-            credentials_path=config["google_sheets"]["credentials_path"],
-            spreadsheet_id=config["google_sheets"]["spreadsheet_id"]
-        )
+        config = _load_config()
+        sheets_reader = _get_sheets_reader(context)
         
         # Get WIP entries
-        wip_entries = sheets_reader.get_wip_entries(config["google_sheets"]["worksheet_name"])
+        wip_entries = with_retry(sheets_reader.get_wip_entries, config["google_sheets"]["worksheet_name"])
         
         if not wip_entries:
             print("ℹ️  No WIP entries found")
@@ -191,15 +245,36 @@ def main():
         ("WIP Entry Reading", test_wip_reading)
     ]
     
-    results = []
+    # Shared by all tests: one config/credentials parse and one authenticated reader
+    context: Dict[str, Any] = {"sheets_reader": None, "lock": threading.Lock()}
+    
+    # The local file checks overlap with the network tests; each test's output
+    # is captured and printed in the usual order once all of them have finished
+    stdout = sys.stdout
+    output = _ThreadOutput(stdout)
     
-    for test_name, test_func in tests:
+    def run_test(test_name, test_func) -> Tuple[bool, str]:
+        buffer = output.capture()
         try:
-            result = test_func()
-            results.append((test_name, result))
+            result = test_func(context)
         except Exception as e:
             print(f"❌ {test_name} failed with exception: {e}")
-            results.append((test_name, False))
+            result = False
+        return result, buffer.getvalue()
+    
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [(test_name, executor.submit(run_test, test_name, test_func)) for test_name, test_func in tests]
+            outcomes = [(test_name, future.result()) for test_name, future in futures]
+    finally:
+        sys.stdout = stdout
+    
+    results = []
+    
+    for test_name, (result, test_output) in outcomes:
+        print(test_output, end="")
+        results.append((test_name, result))
     
     # Summary
     print("\n" + "="*60)